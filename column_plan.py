@@ -0,0 +1,58 @@
+# Default value of a column added through the plan, by column type
+COLUMN_DEFAULTS = {
+    "Text": "",
+    "Number": 0,
+    "Checkbox": False,
+}
+
+def add_column(plan, name, col_type):
+    """Return the plan with a column added."""
+    return plan + [{"op": "add", "column": name, "type": col_type}]
+
+def drop_column(plan, name):
+    """Return the plan with a column removed."""
+    return plan + [{"op": "drop", "column": name}]
+
+def added_columns(plan):
+    """Return the columns added by the plan that are still present, with their types."""
+    added = {}
+    for step in plan:
+        if step["op"] == "add":
+            added[step["column"]] = step["type"]
+        elif step["op"] == "drop":
+            added.pop(step["column"], None)
+    return added
+
+def planned_columns(columns, plan):
+    """Return the column names that result from applying the plan, without touching data."""
+    columns = list(columns)
+    for step in plan:
+        if step["op"] == "add" and step["column"] not in columns:
+            columns.append(step["column"])
+        elif step["op"] == "drop" and step["column"] in columns:
+            columns.remove(step["column"])
+    return columns
+
+def apply_column_plan(df, plan, column_order=None):
+    """
+    Project a frame through the column plan in one pass.
+
+    Existing columns are selected rather than copied, added columns are filled
+    with their defaults, and column_order is applied last when given.
+    """
+    columns = planned_columns(df.columns, plan)
+    added = added_columns(plan)
+
+    # Select the surviving columns, then fill in the added ones that are missing
+    projected = df[[col for col in columns if col in df.columns]]
+    missing = {col: COLUMN_DEFAULTS[added[col]] for col in columns if col not in df.columns and col in added}
+    if missing:
+        projected = projected.assign(**missing)
+    projected = projected[columns]
+
+    if column_order:
+        ordered = [col for col in column_order if col in projected.columns]
+        if ordered:
+            projected = projected[ordered]
+
+    return projected
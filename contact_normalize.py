@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Country code assumed for national phone numbers written without one
+DEFAULT_COUNTRY_CODE = "1"
+
+# Shortest and longest digit counts E.164 allows
+MIN_PHONE_DIGITS = 8
+MAX_PHONE_DIGITS = 15
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s.]+$"
+
+# Columns that identify one owner's contact
+DEDUP_COLUMNS = ["id", "owner_key", "type", "value"]
+
+def normalize_phones(values):
+    """
+    Normalize phone numbers to E.164.
+
+    Numbers with a leading '+' keep their country code, 10-digit numbers get the
+    default one, and anything else that does not fit E.164 becomes NA.
+    """
+    text = values.astype("string").str.strip()
+    digits = text.str.replace(r"\D", "", regex=True)
+    length = digits.str.len().fillna(0).to_numpy()
+    international = text.str.startswith("+").fillna(False).to_numpy(dtype=bool)
+    has_country_code = digits.str.startswith(DEFAULT_COUNTRY_CODE).fillna(False).to_numpy(dtype=bool)
+    plus_digits = ("+" + digits).to_numpy(dtype=object, na_value=None)
+
+    normalized = np.select(
+        [
+            international & (length >= MIN_PHONE_DIGITS) & (length <= MAX_PHONE_DIGITS),
+            ~international & (length == 10),
+            ~international & (length == 10 + len(DEFAULT_COUNTRY_CODE)) & has_country_code,
+        ],
+        [
+            plus_digits,
+            ("+" + DEFAULT_COUNTRY_CODE + digits).to_numpy(dtype=object, na_value=None),
+            plus_digits,
+        ],
+        default=None
+    )
+    return pd.Series(normalized, index=values.index, dtype="string")
+
+def normalize_emails(values):
+    """Trim and lowercase email addresses, turning invalid ones into NA."""
+    text = values.astype("string").str.strip().str.lower()
+    return text.where(text.str.match(EMAIL_PATTERN).fillna(False))
+
+def normalize_values(types, values):
+    """Normalize contact values by type in one pass over each type."""
+    is_phone = (types == "phone_number").to_numpy()
+    is_email = (types == "email").to_numpy()
+
+    normalized = pd.Series(pd.NA, index=values.index, dtype="string")
+    normalized[is_phone] = normalize_phones(values[is_phone])
+    normalized[is_email] = normalize_emails(values[is_email])
+    return normalized
+
+def normalize_contacts(df):
+    """
+    Normalize contact values and drop invalid and duplicate contacts.
+
+    Duplicates are found per owner by hashing the property id, the owner name and
+    the normalized value. Returns the cleaned frame and a report of what was dropped.
+    """
+    normalized = normalize_values(df["type"].astype(str), df["value"])
+    valid = normalized.notna().to_numpy()
+    is_phone = (df["type"].astype(str) == "phone_number").to_numpy()
+
+    report = {
+        "invalid_phones": int((~valid & is_phone).sum()),
+        "invalid_emails": int((~valid & ~is_phone).sum()),
+    }
+
+    cleaned = df[valid].assign(value=normalized[valid])
+
+    # Owner names are compared without case or extra whitespace
+    keys = cleaned[["id", "type", "value"]].astype(str).assign(
+        owner_key=cleaned["name"].astype(str).str.split().str.join(" ").str.lower()
+    )[DEDUP_COLUMNS]
+    hashes = pd.util.hash_pandas_object(keys, index=False)
+    duplicated = hashes.duplicated().to_numpy()
+
+    report["duplicates"] = int(duplicated.sum())
+    return cleaned[~duplicated], report
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Stable integer id given to every contact row when it enters the session
+ROW_ID = "_row_id"
+
+def with_row_ids(contacts):
+    """Return the contacts with a stable integer row id, numbering only rows that lack one."""
+    if contacts is None:
+        return None
+    if ROW_ID not in contacts.columns:
+        return contacts.assign(**{ROW_ID: np.arange(len(contacts), dtype=np.int64)})
+
+    ids = contacts[ROW_ID]
+    missing = ids.isna().to_numpy() | ids.duplicated().to_numpy()
+    if not missing.any():
+        return contacts
+
+    # Keep existing ids and number new or duplicated rows after the highest one
+    start = int(ids[~missing].max()) + 1 if (~missing).any() else 0
+    filled = ids.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    filled[missing] = np.arange(start, start + missing.sum())
+    return contacts.assign(**{ROW_ID: filled.astype(np.int64)})
+
+def initial_selection(contacts):
+    """Build the selection array of a contact table from its 'selected' column."""
+    ids = contacts[ROW_ID].to_numpy()
+    selection = np.zeros(int(ids.max()) + 1 if len(ids) else 0, dtype=bool)
+    if "selected" in contacts.columns:
+        selection[ids] = contacts["selected"].fillna(False).to_numpy(dtype=bool)
+    else:
+        selection[ids] = True
+    return selection
+
+def get_selection(contacts, key="contact_selection"):
+    """
+    Return the boolean selection array of a contact table, indexed by row id.
+
+    The array is kept in session state and rebuilt only when the table changes.
+    """
+    cached = st.session_state.get(key)
+    if cached is not None and cached["contacts"] is contacts:
+        return cached["selection"]
+
+    selection = initial_selection(contacts)
+    st.session_state[key] = {"contacts": contacts, "selection": selection, "editor_inputs": {}}
+    return selection
+
+def editor_input(rows, selection, editor_key, key="contact_selection"):
+    """
+    Return the frame to show in a selection editor, fixed while the editor is on screen.
+
+    The data_editor widget id covers its data, so feeding it the updated selection
+    would reset it after every change. The input is taken from the selection array
+    only when the editor has no state yet: on first render, or after it was off-screen.
+    """
+    inputs = st.session_state[key]["editor_inputs"]
+    if editor_key not in st.session_state or editor_key not in inputs:
+        inputs[editor_key] = rows.assign(selected=selection[rows.index.to_numpy()])
+    return inputs[editor_key]
+
+def changed_selection(original, edited):
+    """Return the (row ids, selected flags) of the rows whose flag an editor changed."""
+    before = original["selected"].to_numpy(dtype=bool)
+    after = edited["selected"].fillna(False).to_numpy(dtype=bool)
+    changed = before != after
+    return edited.index.to_numpy()[changed], after[changed]
+
+def apply_selection_edits(selection, edits):
+    """Apply (row ids, selected flags) pairs collected from the editors in one update."""
+    if not edits:
+        return selection
+    ids = np.concatenate([np.asarray(row_ids, dtype=np.int64) for row_ids, _ in edits])
+    flags = np.concatenate([pd.Series(values).fillna(False).to_numpy(dtype=bool) for _, values in edits])
+    selection[ids] = flags
+    return selection
+
+def selected_contacts(contacts, selection):
+    """Return the contacts with their 'selected' column taken from the selection array."""
+    return contacts.assign(selected=selection[contacts[ROW_ID].to_numpy()])
+
+def apply_row_edits(contacts, edited_pages):
+    """
+    Write edited editor pages back into the contact table in one update.
+
+    Each page is an (original, edited) pair of frames indexed by row id; the table
+    is returned unchanged when no page was edited.
+    """
+    changed = [edited for original, edited in edited_pages if not edited.equals(original)]
+    if not changed:
+        return contacts
+
+    edits = pd.concat(changed)
+    positions = pd.Index(contacts[ROW_ID]).get_indexer(edits.index)
+    known = positions != -1
+    updated = contacts.copy(deep=False)
+    for col in edits.columns:
+        if col in updated.columns:
+            column = updated[col].copy()
+            column.iloc[positions[known]] = edits[col].to_numpy()[known]
+            updated[col] = column
+    return updated
@@ -0,0 +1,73 @@
+import io
+import numpy as np
+import pandas as pd
+
+# Columns tried, in order, to match tax-certificate rows to property rows
+DIFF_KEYS = ["Account Number", "Alternate Key"]
+
+def read_source(file):
+    """Read an uploaded CSV with every column as text so values compare exactly."""
+    if hasattr(file, "seek"):
+        file.seek(0)
+    df = pd.read_csv(file, dtype=str, keep_default_na=False)
+    df.columns = [col.strip() for col in df.columns]
+    return df
+
+def find_join_key(tax_df, property_df):
+    """Return the first key column present in both frames."""
+    for key in DIFF_KEYS:
+        if key in tax_df.columns and key in property_df.columns:
+            return key
+    raise ValueError(f"No common key column found. Expected one of: {', '.join(DIFF_KEYS)}")
+
+def row_fingerprints(df, columns):
+    """Hash the given columns of every row into a single uint64 per row."""
+    if not columns:
+        return pd.Series(0, index=df.index, dtype="uint64")
+    return pd.util.hash_pandas_object(df[columns], index=False)
+
+def diff_frames(tax_df, property_df):
+    """
+    Find tax-certificate rows that are new or changed relative to the property file.
+
+    A row is new when its key is missing from the property file, and changed when
+    the key matches but the values of the shared columns differ. Property-only
+    columns are joined onto the result for matched keys.
+    """
+    key = find_join_key(tax_df, property_df)
+    shared = [col for col in tax_df.columns if col in property_df.columns and col != key]
+
+    # Build the hash index on the property side, one row per key
+    property_side = property_df.drop_duplicates(subset=[key], keep="last")
+    property_index = pd.Index(property_side[key])
+    property_prints = row_fingerprints(property_side, shared).to_numpy()
+
+    # Probe the index with the tax-certificate fingerprints
+    positions = property_index.get_indexer(tax_df[key])
+    tax_prints = row_fingerprints(tax_df, shared).to_numpy()
+    is_new = positions == -1
+    is_changed = np.zeros(len(tax_df), dtype=bool)
+    is_changed[~is_new] = property_prints[positions[~is_new]] != tax_prints[~is_new]
+    result = tax_df[is_new | is_changed]
+
+    # Bring in property-only columns for rows that matched a key
+    extra = [col for col in property_side.columns if col not in tax_df.columns]
+    if extra:
+        result = result.merge(property_side[[key] + extra], on=key, how="left")
+
+    return result.reset_index(drop=True)
+
+def check_new_rows_local(file1, file2):
+    """Run the new-row check locally and return the same shape as the check_new_rows API."""
+    result = diff_frames(read_source(file1), read_source(file2))
+    csv = result.to_csv(index=False)
+
+    # Re-infer column types so the records match what the API returns
+    typed = pd.read_csv(io.StringIO(csv)) if len(result) else result
+    records = typed.astype(object).where(typed.notna(), None).to_dict("records")
+
+    return {
+        "count": len(result),
+        "json": records,
+        "csv": csv
+    }
@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+
+# Requests in flight at once, per channel
+CHANNEL_LIMITS = {"sms": 4, "email": 8}
+
+# Requests started per second across all channels
+DEFAULT_RATE_PER_SECOND = 10.0
+
+# Retries of a request that timed out or got a 5xx, with exponential backoff
+MAX_RETRIES = 3
+RETRY_INITIAL_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_BACKOFF = 2.0
+RETRY_JITTER = 0.25
+
+class RetryableError(Exception):
+    """A send failed in a way worth retrying, such as a 5xx response."""
+
+RETRYABLE_ERRORS = (RetryableError, requests.Timeout, requests.ConnectionError)
+
+def make_rate_limiter(rate_per_second):
+    """Return a function that blocks until the next request may start."""
+    interval = 1.0 / rate_per_second if rate_per_second else 0.0
+    lock = threading.Lock()
+    next_slot = [time.monotonic()]
+
+    def acquire():
+        # Reserve the next free slot, then sleep outside the lock until it comes
+        with lock:
+            now = time.monotonic()
+            slot = max(next_slot[0], now)
+            next_slot[0] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    return acquire
+
+def send_with_retry(item, send, acquire, max_retries=MAX_RETRIES):
+    """Send one item, retrying timeouts and 5xx responses with backoff."""
+    delay = RETRY_INITIAL_DELAY
+    for attempt in range(max_retries + 1):
+        acquire()
+        try:
+            return send(item)
+        except RETRYABLE_ERRORS as e:
+            error = e
+        except Exception as e:
+            return str(e), False
+
+        if attempt < max_retries:
+            time.sleep(delay * (1 + random.uniform(-RETRY_JITTER, RETRY_JITTER)))
+            delay = min(delay * RETRY_BACKOFF, RETRY_MAX_DELAY)
+
+    return str(error) or type(error).__name__, False
+
+def dispatch(items, send, channel_of, channel_limits=None, rate_per_second=DEFAULT_RATE_PER_SECOND,
+             max_retries=MAX_RETRIES, on_result=None):
+    """
+    Send items concurrently and return their (response, success) results in input order.
+
+    Each channel gets its own pool sized to its concurrency limit, and all channels
+    share one rate limit. send must not touch the UI since it runs in worker threads;
+    on_result(index, result) is called from the calling thread as results arrive.
+    """
+    channel_limits = CHANNEL_LIMITS if channel_limits is None else channel_limits
+    acquire = make_rate_limiter(rate_per_second)
+    results = [None] * len(items)
+    pools = {}
+    futures = {}
+
+    try:
+        for index, item in enumerate(items):
+            channel = channel_of(item)
+            if channel not in pools:
+                pools[channel] = ThreadPoolExecutor(
+                    max_workers=max(int(channel_limits.get(channel, 1)), 1),
+                    thread_name_prefix=f"dispatch-{channel}"
+                )
+            futures[pools[channel].submit(send_with_retry, item, send, acquire, max_retries)] = index
+
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result is not None:
+                on_result(index, results[index])
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return results
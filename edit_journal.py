@@ -0,0 +1,112 @@
+import pandas as pd
+from schema import PROPERTY_SCHEMA, apply_schema
+from session_store import view
+
+def new_journal(next_key=0):
+    """Create an empty edit journal; next_key is the first key handed to added rows."""
+    return {
+        "cells": {},
+        "added": {},
+        "deleted": set(),
+        "next_key": next_key
+    }
+
+def journal_size(journal):
+    """Count the pending changes in a journal."""
+    if not journal:
+        return 0
+    return len(journal["cells"]) + len(journal["added"]) + len(journal["deleted"])
+
+def same_value(a, b):
+    """Compare two cell values, treating missing values as equal."""
+    if pd.isna(a) and pd.isna(b):
+        return True
+    if pd.isna(a) or pd.isna(b):
+        return False
+    return a == b
+
+def record_page_edits(journal, base, page, edits):
+    """
+    Record the editor changes for one page against row keys.
+
+    Returns True when rows were added or deleted, which means the editor has to
+    be reset before its changes are read again.
+    """
+    for pos, row_changes in (edits.get("edited_rows") or {}).items():
+        row_key = page.index[int(pos)]
+        for col, value in row_changes.items():
+            if row_key in journal["added"]:
+                journal["added"][row_key][col] = value
+            elif same_value(base.at[row_key, col], value):
+                journal["cells"].pop((row_key, col), None)
+            else:
+                journal["cells"][(row_key, col)] = value
+
+    deleted_rows = edits.get("deleted_rows") or []
+    for pos in deleted_rows:
+        row_key = page.index[int(pos)]
+        if journal["added"].pop(row_key, None) is None:
+            journal["deleted"].add(row_key)
+
+    added_rows = edits.get("added_rows") or []
+    for row in added_rows:
+        add_row(journal, row)
+
+    return bool(added_rows or deleted_rows)
+
+def add_row(journal, row):
+    """Record a new row and return the key it was given."""
+    row_key = journal["next_key"]
+    journal["added"][row_key] = dict(row)
+    journal["next_key"] += 1
+    return row_key
+
+def visible_row_keys(keys, journal):
+    """Return the base keys without deleted rows, followed by the added rows."""
+    if journal["deleted"]:
+        keys = keys[~keys.isin(list(journal["deleted"]))]
+    if journal["added"]:
+        keys = keys.append(pd.Index(list(journal["added"].keys())))
+    return keys
+
+def journal_page(base, journal, page_keys):
+    """Build one page of the edited data from the base frame and the journal."""
+    added_keys = [key for key in page_keys if key in journal["added"]]
+    page = base.loc[[key for key in page_keys if key not in journal["added"]]]
+
+    if added_keys:
+        added = pd.DataFrame([journal["added"][key] for key in added_keys], index=added_keys)
+        page = apply_schema(pd.concat([page, added]), PROPERTY_SCHEMA)
+
+    # Overlay the edited cells that fall on this page
+    for (row_key, col), value in journal["cells"].items():
+        if row_key in page.index:
+            page.loc[row_key, col] = value
+
+    return page
+
+def apply_journal(frame, journal):
+    """Apply every pending change to the frame in one pass per column."""
+    if not journal_size(journal):
+        return frame
+
+    frame = view(frame)
+
+    if journal["deleted"]:
+        frame = frame.drop(index=list(journal["deleted"]), errors="ignore")
+
+    # Group the cell edits by column so each column is written once
+    by_column = {}
+    for (row_key, col), value in journal["cells"].items():
+        if row_key in frame.index:
+            by_column.setdefault(col, ([], []))
+            by_column[col][0].append(row_key)
+            by_column[col][1].append(value)
+    for col, (row_keys, values) in by_column.items():
+        frame.loc[row_keys, col] = values
+
+    if journal["added"]:
+        added = pd.DataFrame(list(journal["added"].values()), index=list(journal["added"].keys()))
+        frame = apply_schema(pd.concat([frame, added]), PROPERTY_SCHEMA)
+
+    return frame
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import io
+import tempfile
+import threading
+import weakref
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows serialized per chunk
+EXPORT_CHUNK_ROWS = 50_000
+
+# Exports larger than this are spooled to disk
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# Number of finished exports kept for reuse
+MAX_CACHED_EXPORTS = 8
+
+# Format name -> (file name, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("processed_data.csv", "text/csv"),
+    "CSV (gzip)": ("processed_data.csv.gz", "application/gzip"),
+    "JSON": ("processed_data.json", "application/json"),
+    "Parquet": ("processed_data.parquet", "application/octet-stream"),
+}
+
+# (fingerprint, format) -> spooled file holding the finished export
+_export_cache = {}
+
+# id(frame) -> (weak reference to the frame, fingerprint)
+_fingerprint_cache = {}
+
+# Sessions run in separate threads and share the cached files
+_export_lock = threading.RLock()
+
+def frame_fingerprint(df):
+    """Return a content fingerprint of a frame, computed once per frame object."""
+    cached = _fingerprint_cache.get(id(df))
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    digest = hashlib.sha1()
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+
+    # Forget frames that no longer exist
+    for frame_id in [key for key, (ref, _) in _fingerprint_cache.items() if ref() is None]:
+        del _fingerprint_cache[frame_id]
+    _fingerprint_cache[id(df)] = (weakref.ref(df), fingerprint)
+    return fingerprint
+
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield consecutive row slices of a frame."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start == 0, df.iloc[start:start + chunk_rows]
+
+def write_csv(df, out):
+    """Write CSV text to a binary file in chunks."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    for first, chunk in iter_chunks(df):
+        chunk.to_csv(text, header=first, index=False)
+    text.flush()
+    text.detach()
+
+def write_gzip_csv(df, out):
+    """Write gzip-compressed CSV to a binary file in chunks."""
+    with gzip.GzipFile(fileobj=out, mode="wb") as compressed:
+        write_csv(df, compressed)
+
+def write_json(df, out):
+    """Write a JSON array of records to a binary file in chunks."""
+    out.write(b"[")
+    for first, chunk in iter_chunks(df):
+        records = chunk.to_json(orient="records")[1:-1]
+        if records:
+            if not first:
+                out.write(b",")
+            out.write(records.encode("utf-8"))
+    out.write(b"]")
+
+def write_parquet(df, out):
+    """Write Parquet to a binary file, one row group per chunk."""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for _, chunk in iter_chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+WRITERS = {
+    "CSV": write_csv,
+    "CSV (gzip)": write_gzip_csv,
+    "JSON": write_json,
+    "Parquet": write_parquet,
+}
+
+def get_export(df, export_format):
+    """
+    Return a spooled file holding the export of a frame in the given format.
+
+    Exports are cached by content fingerprint, so unchanged data is serialized
+    only once per format.
+    """
+    key = (frame_fingerprint(df), export_format)
+
+    with _export_lock:
+        spool = _export_cache.get(key)
+        if spool is None:
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+            WRITERS[export_format](df, spool)
+
+            # Drop the oldest export once the cache is full
+            if len(_export_cache) >= MAX_CACHED_EXPORTS:
+                _export_cache.pop(next(iter(_export_cache))).close()
+            _export_cache[key] = spool
+
+        spool.seek(0)
+        return spool
+
+def export_bytes(df, export_format):
+    """Return the export of a frame as bytes for a download button."""
+    with _export_lock:
+        return get_export(df, export_format).read()
@@ -0,0 +1,99 @@
+import pandas as pd
+from schema import PROPERTY_SCHEMA, NUMERIC_DTYPES, STRING, CATEGORY, apply_schema
+
+# Default memory budget for a single parsed chunk
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Rough in-memory size of an object-dtype frame relative to the CSV text it came from
+OBJECT_OVERHEAD = 6
+
+# Bytes sampled from the head of the file to estimate the row width
+SAMPLE_BYTES = 64 * 1024
+
+MIN_CHUNK_ROWS = 1_000
+
+def estimate_chunk_rows(file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Estimate how many rows fit in one chunk for the given memory budget."""
+    start = file.tell()
+    sample = file.read(SAMPLE_BYTES)
+    file.seek(start)
+
+    if isinstance(sample, bytes):
+        lines = sample.count(b"\n")
+    else:
+        lines = sample.count("\n")
+
+    # Ignore the header line and guard against a single long line
+    bytes_per_row = len(sample) / max(lines - 1, 1)
+    budget = memory_budget_mb * 1024 * 1024
+    return max(int(budget / (bytes_per_row * OBJECT_OVERHEAD)), MIN_CHUNK_ROWS)
+
+def text_dtypes(file, schema=PROPERTY_SCHEMA):
+    """
+    Return the read_csv dtypes that keep the text columns of the schema as written.
+
+    Without them, digits-only ids and phone numbers are inferred as numbers and
+    lose leading zeros or gain a ".0" before they are cast to strings.
+    """
+    start = file.tell()
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(start)
+    return {col: str for col in header if schema.get(str(col).strip()) in (STRING, CATEGORY)}
+
+def coerce_chunk(chunk, stats, schema=PROPERTY_SCHEMA):
+    """Validate and compact one parsed chunk in place of the raw object columns."""
+    chunk.columns = [str(col).strip() for col in chunk.columns]
+    present = chunk.notna()
+
+    # Categoricals are built once after assembly so chunk categories never clash
+    chunk = apply_schema(chunk, schema, categorize=False)
+
+    for col in chunk.columns:
+        # Count values that could not be parsed as numbers
+        if str(schema.get(col)) in NUMERIC_DTYPES:
+            invalid = int((present[col] & chunk[col].isna()).sum())
+            if invalid:
+                stats["coerced"][col] = stats["coerced"].get(col, 0) + invalid
+        elif chunk[col].dtype == object:
+            chunk[col] = chunk[col].astype(STRING)
+
+    return chunk
+
+def read_csv_chunked(file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, on_progress=None, schema=PROPERTY_SCHEMA):
+    """
+    Read a CSV in bounded chunks and assemble a compact frame.
+
+    Each chunk is coerced to compact dtypes before the next one is parsed, so the
+    full object-dtype frame never exists. Returns the frame and ingest stats.
+    """
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    chunk_rows = estimate_chunk_rows(file, memory_budget_mb)
+    dtypes = text_dtypes(file, schema)
+    total_bytes = getattr(file, "size", None)
+    stats = {"rows": 0, "chunks": 0, "chunk_rows": chunk_rows, "coerced": {}}
+    chunks = []
+    columns = None
+
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, low_memory=True, dtype=dtypes):
+        chunk = coerce_chunk(chunk, stats, schema)
+
+        # Every chunk must carry the same header
+        if columns is None:
+            columns = list(chunk.columns)
+        elif list(chunk.columns) != columns:
+            raise ValueError("Column mismatch between chunks")
+
+        chunks.append(chunk)
+        stats["rows"] += len(chunk)
+        stats["chunks"] += 1
+
+        if on_progress is not None and total_bytes:
+            on_progress(min(file.tell() / total_bytes, 1.0))
+
+    if not chunks:
+        return pd.DataFrame(), stats
+
+    df = pd.concat(chunks, ignore_index=True, copy=False)
+    return apply_schema(df, schema), stats
@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+# Delay before the first status check and the cap on the backoff
+POLL_INITIAL_DELAY = 2.0
+POLL_MAX_DELAY = 60.0
+POLL_BACKOFF = 2.0
+
+# Random spread applied to every delay so pollers do not fire together
+POLL_JITTER = 0.25
+
+# Give up on a job that has not finished after this long
+POLL_TIMEOUT_SECONDS = 6 * 60 * 60
+
+COMPLETED_STATUSES = {"completed"}
+FAILED_STATUSES = {"failed", "error", "cancelled"}
+
+# job_id -> state shared between the poller threads and script reruns
+_jobs = {}
+_wake_events = {}
+_lock = threading.Lock()
+
+def next_delay(delay):
+    """Return the following backoff delay, capped and with jitter applied."""
+    delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+    return delay * (1 + random.uniform(-POLL_JITTER, POLL_JITTER))
+
+def update_job(job_id, **changes):
+    """Update the shared state of a job."""
+    with _lock:
+        state = _jobs.setdefault(job_id, {})
+        state.update(changes)
+        state["updated_at"] = time.time()
+        state["version"] = state.get("version", 0) + 1
+
+def get_job_state(job_id):
+    """Return a snapshot of the shared state of a job, or None if it is not polled."""
+    with _lock:
+        state = _jobs.get(job_id)
+        return dict(state) if state is not None else None
+
+def poll_job(job_id, fetch_status, fetch_results):
+    """Poll a job until it finishes, then fetch its results."""
+    delay = POLL_INITIAL_DELAY
+    deadline = time.time() + POLL_TIMEOUT_SECONDS
+    wake = _wake_events[job_id]
+    checks = 0
+
+    while time.time() < deadline:
+        try:
+            info = fetch_status(job_id)
+            if info is not None:
+                status = info.get("status")
+                checks += 1
+                update_job(job_id, status=status, info=info, error=None, checks=checks)
+
+                if status in COMPLETED_STATUSES:
+                    update_job(job_id, results=fetch_results(job_id), done=True)
+                    return
+                if status in FAILED_STATUSES:
+                    update_job(job_id, done=True)
+                    return
+        except Exception as e:
+            update_job(job_id, error=str(e))
+
+        # Sleep until the next check, or until a check is requested
+        wake.wait(delay)
+        if wake.is_set():
+            wake.clear()
+            delay = POLL_INITIAL_DELAY
+        else:
+            delay = next_delay(delay)
+
+    update_job(job_id, error="Stopped polling: job did not finish in time", done=True)
+
+def start_polling(job_id, fetch_status, fetch_results):
+    """Start a background poller for a job unless one is already running."""
+    with _lock:
+        if job_id in _wake_events:
+            return
+        _wake_events[job_id] = threading.Event()
+        _jobs[job_id] = {"status": "submitted", "done": False, "checks": 0, "version": 0, "updated_at": time.time()}
+
+    thread = threading.Thread(
+        target=poll_job,
+        args=(job_id, fetch_status, fetch_results),
+        name=f"job-poller-{job_id}",
+        daemon=True
+    )
+    thread.start()
+
+def forget_job(job_id):
+    """Drop the shared state of a finished job, including its results."""
+    with _lock:
+        _jobs.pop(job_id, None)
+        _wake_events.pop(job_id, None)
+
+def poll_now(job_id):
+    """Ask the poller of a job to check its status right away."""
+    event = _wake_events.get(job_id)
+    if event is not None:
+        event.set()
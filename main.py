@@ -1,5 +1,6 @@
 import streamlit as st
 import time
+import session_store
 from utils import initialize_session_state, call_api, show_progress_bar
 import step1_upload
 import step2_review
@@ -76,6 +77,11 @@ with st.sidebar:
         
     st.markdown("---")
     
+    # Memory used by the frames held in this session
+    with st.expander("Session Memory"):
+        if st.checkbox("Show memory usage", key="show_memory_usage"):
+            session_store.show_memory_report()
+    
     # Help information
     with st.expander("Help & Information"):
         st.markdown("""
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+import pandas as pd
+
+# Location of the on-disk notification outbox
+OUTBOX_PATH = os.environ.get(
+    "OUTBOX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "notification_outbox.sqlite")
+)
+
+# Contact columns that identify one notification
+KEY_COLUMNS = ["id", "name", "type", "value"]
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+def connect(path=OUTBOX_PATH):
+    """Open the outbox database, creating the table on first use."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS outbox (
+            key TEXT PRIMARY KEY,
+            campaign TEXT,
+            position INTEGER,
+            contact TEXT,
+            status TEXT,
+            attempts INTEGER,
+            response TEXT,
+            updated_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS outbox_campaign_status ON outbox (campaign, status, position);
+        CREATE TABLE IF NOT EXISTS campaigns (
+            id TEXT PRIMARY KEY,
+            contact_set TEXT,
+            created_at REAL,
+            closed INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS campaigns_contact_set ON campaigns (contact_set, closed, created_at);
+    """)
+    return conn
+
+def contact_hashes(contacts):
+    """Return one uint64 hash per contact from the columns that identify it."""
+    keys = contacts.reindex(columns=KEY_COLUMNS).astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+def contact_set_id(contacts):
+    """Identify a set of contacts, so an unfinished campaign to it can be found on any day."""
+    return hashlib.sha1(contact_hashes(contacts).tobytes()).hexdigest()[:16]
+
+def start_campaign(contacts, path=OUTBOX_PATH):
+    """
+    Open a new campaign to a set of contacts and return its id.
+
+    Earlier campaigns to the same contacts are closed, so they are no longer
+    offered for resuming; every send is a campaign of its own.
+    """
+    contact_set = contact_set_id(contacts)
+    campaign = f"{contact_set}-{uuid.uuid4().hex[:8]}"
+    with closing(connect(path)) as conn, conn:
+        conn.execute("UPDATE campaigns SET closed = 1 WHERE contact_set = ?", (contact_set,))
+        conn.execute("INSERT INTO campaigns VALUES (?, ?, ?, 0)", (campaign, contact_set, time.time()))
+    return campaign
+
+def unfinished_campaign(contacts, path=OUTBOX_PATH):
+    """Return the id of the open campaign to a set of contacts that still has pending or failed contacts, or None."""
+    with closing(connect(path)) as conn:
+        row = conn.execute(
+            "SELECT c.id FROM campaigns c WHERE c.contact_set = ? AND c.closed = 0 AND EXISTS ("
+            "SELECT 1 FROM outbox o WHERE o.campaign = c.id AND o.status IN (?, ?)) "
+            "ORDER BY c.created_at DESC LIMIT 1",
+            (contact_set_id(contacts), PENDING, FAILED)
+        ).fetchone()
+    return row[0] if row else None
+
+def idempotency_keys(contacts, campaign):
+    """Return the idempotency key of every contact within a campaign."""
+    return [f"{campaign}:{h:016x}" for h in contact_hashes(contacts)]
+
+def enqueue(contacts, campaign, path=OUTBOX_PATH):
+    """
+    Add every contact of a campaign to the outbox as pending.
+
+    Contacts already in the outbox keep their status, so enqueueing again is safe.
+    Returns the number of contacts that were new.
+    """
+    keys = idempotency_keys(contacts, campaign)
+    records = contacts.to_dict('records')
+    now = time.time()
+    with closing(connect(path)) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO outbox VALUES (?, ?, ?, ?, ?, 0, NULL, ?)",
+            (
+                (key, campaign, position, json.dumps(record, default=str), PENDING, now)
+                for position, (key, record) in enumerate(zip(keys, records))
+            )
+        )
+        return conn.total_changes - before
+
+def pending(campaign, retry_failed=False, path=OUTBOX_PATH):
+    """Return the (key, contact) pairs still to send in a campaign, in campaign order."""
+    statuses = (PENDING, FAILED) if retry_failed else (PENDING,)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            f"SELECT key, contact FROM outbox WHERE campaign = ? AND status IN ({', '.join('?' for _ in statuses)}) "
+            "ORDER BY position",
+            (campaign, *statuses)
+        ).fetchall()
+    return [(key, json.loads(contact)) for key, contact in rows]
+
+def mark(conn, key, success, response):
+    """Record the outcome of one send, committed right away so it survives a crash."""
+    with conn:
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, response = ?, updated_at = ? WHERE key = ?",
+            (SENT if success else FAILED, str(response), time.time(), key)
+        )
+
+def campaign_counts(campaign, path=OUTBOX_PATH):
+    """Return the number of contacts of a campaign in each status."""
+    with closing(connect(path)) as conn:
+        rows = conn.execute("SELECT status, COUNT(*) FROM outbox WHERE campaign = ? GROUP BY status", (campaign,)).fetchall()
+    counts = {PENDING: 0, SENT: 0, FAILED: 0}
+    counts.update(dict(rows))
+    return counts
+
+def campaign_report(campaign, path=OUTBOX_PATH):
+    """Return every contact of a campaign with its status, in campaign order."""
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT contact, status, response, updated_at FROM outbox WHERE campaign = ? ORDER BY position",
+            (campaign,)
+        ).fetchall()
+    contacts = pd.DataFrame([json.loads(contact) for contact, _, _, _ in rows])
+    return contacts.assign(
+        outbox_status=[status for _, status, _, _ in rows],
+        outbox_response=[response for _, _, response, _ in rows],
+        outbox_updated_at=[time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(updated)) for _, _, _, updated in rows]
+    )
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pager import page_controls
+
+OWNER_COLUMNS = ["id", "name", "address"]
+
+def owner_table(relation):
+    """Return one row per owner with its contact count, built once per relation."""
+    owners = relation.get("owners")
+    if owners is not None:
+        return owners
+
+    contacts = relation["contacts"]
+    owner_index = relation["owner_index"]
+    if owner_index:
+        # The first contact of each owner supplies the name and address shown in the browser
+        positions = list(owner_index.values())
+        first = np.fromiter((p[0] for p in positions), dtype=np.intp, count=len(positions))
+        owners = contacts.iloc[first].reindex(columns=OWNER_COLUMNS).reset_index(drop=True)
+        owners.insert(0, "owner", pd.Series(list(owner_index.keys()), dtype=object))
+        owners["contacts"] = np.fromiter((len(p) for p in positions), dtype=np.intp, count=len(positions))
+
+        # An owner resolved across parcels lists every property id it was found on
+        ids = contacts["id"].astype(str).to_numpy()
+        owners["properties"] = [", ".join(pd.unique(ids[p])) for p in positions]
+
+        # Lowercased text matched by the owner search
+        owners["search_text"] = (
+            owners["name"].astype(str) + " " + owners["address"].astype(str) + " " + owners["properties"]
+        ).str.lower()
+    else:
+        owners = pd.DataFrame(columns=["owner"] + OWNER_COLUMNS + ["contacts", "properties", "search_text"])
+
+    relation["owners"] = owners
+    return owners
+
+def browse_owners(relation, key, default_size=25):
+    """Render owner search and paging controls and return the owners on the current page."""
+    owners = owner_table(relation)
+
+    search = st.text_input("Search owners", key=f"{key}_search", placeholder="Name, address or ID")
+    if search:
+        owners = owners[owners["search_text"].str.contains(search.strip().lower(), regex=False)]
+
+    start, end = page_controls(len(owners), key, default_size=default_size, label="Owners per page")
+    return owners.iloc[start:end]
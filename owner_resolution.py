@@ -0,0 +1,104 @@
+from difflib import SequenceMatcher
+import numpy as np
+import pandas as pd
+
+# Canonical owner id shared by contacts that belong to the same person
+OWNER_ID = "owner_id"
+
+# Minimum similarity of two normalized names in the same block to be merged
+NAME_SIMILARITY = 0.88
+
+# Blocks larger than this only merge exact name matches
+MAX_BLOCK_SIZE = 200
+
+# Tokens that do not help tell owners apart
+NAME_NOISE = {"jr", "sr", "ii", "iii", "iv", "mr", "mrs", "ms", "dr", "and", "etal", "et", "al"}
+
+ZIP_PATTERN = r"(\d{5})(?:-\d{4})?\D*$"
+
+def name_tokens(names):
+    """Split names into sorted lowercase tokens without punctuation, initials or titles."""
+    words = names.astype(str).str.lower().str.replace(r"[^a-z0-9\s]", " ", regex=True).str.split()
+    return [sorted(w for w in tokens if (len(w) > 1 or w.isdigit()) and w not in NAME_NOISE) for tokens in words]
+
+def address_zips(addresses):
+    """Extract the trailing ZIP code of each address, or an empty string."""
+    return addresses.astype(str).str.extract(ZIP_PATTERN, expand=False).fillna("")
+
+def find_root(parents, i):
+    """Return the root of an element in a union-find forest, compressing the path."""
+    root = i
+    while parents[root] != root:
+        root = parents[root]
+    while parents[i] != root:
+        parents[i], i = root, parents[i]
+    return root
+
+def similar(a, b, threshold=NAME_SIMILARITY):
+    """Return whether two normalized names are similar enough to be the same owner."""
+    # Numbers in names (e.g. "Owner 1", "Trust 2") must match exactly
+    if [w for w in a.split() if w.isdigit()] != [w for w in b.split() if w.isdigit()]:
+        return False
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return (
+        matcher.real_quick_ratio() >= threshold
+        and matcher.quick_ratio() >= threshold
+        and matcher.ratio() >= threshold
+    )
+
+def resolve_owners(contacts, threshold=NAME_SIMILARITY):
+    """
+    Give every contact a canonical owner id.
+
+    Contacts whose normalized names match and share a ZIP are one owner outright.
+    Remaining names are compared fuzzily only inside blocks keyed by a name token
+    (first or last) plus ZIP, so the number of comparisons stays far below
+    quadratic. Contacts that already carry owner ids are returned unchanged.
+    """
+    if contacts is None:
+        return None
+    if OWNER_ID in contacts.columns and contacts[OWNER_ID].notna().all():
+        return contacts
+
+    # One unit per distinct (normalized name, ZIP)
+    tokens = name_tokens(contacts["name"])
+    normalized = pd.Series([" ".join(t) for t in tokens], index=contacts.index)
+
+    # Names with nothing left after normalization stay separate per property
+    unnamed = normalized == ""
+    if unnamed.any():
+        normalized[unnamed] = "#" + contacts["id"].astype(str)[unnamed] + "|" + contacts["name"].astype(str)[unnamed]
+
+    zips = address_zips(contacts["address"]) if "address" in contacts.columns else pd.Series("", index=contacts.index)
+    units = pd.DataFrame({"name": normalized.to_numpy(), "zip": zips.to_numpy()})
+    unit_codes, _ = pd.factorize(pd.util.hash_pandas_object(units, index=False))
+    first_rows = pd.Series(np.arange(len(units))).groupby(unit_codes).first().to_numpy()
+    unit_names = units["name"].to_numpy()[first_rows]
+    unit_zips = units["zip"].to_numpy()[first_rows]
+    unit_tokens = [tokens[row] for row in first_rows]
+
+    # Blocking keys: first and last name token with the ZIP
+    block_units = []
+    block_keys = []
+    for unit, words in enumerate(unit_tokens):
+        for word in {words[0], words[-1]} if words else ():
+            block_units.append(unit)
+            block_keys.append(f"{word}|{unit_zips[unit]}")
+    blocks = pd.Series(block_units, dtype=np.intp).groupby(block_keys, sort=False).indices if block_units else {}
+    block_units = np.asarray(block_units, dtype=np.intp)
+
+    # Merge similar names inside each block
+    parents = list(range(len(first_rows)))
+    for positions in blocks.values():
+        members = block_units[positions]
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                root_a, root_b = find_root(parents, a), find_root(parents, b)
+                if root_a != root_b and similar(unit_names[a], unit_names[b], threshold):
+                    parents[root_b] = root_a
+
+    roots = np.array([find_root(parents, unit) for unit in range(len(parents))], dtype=np.intp)
+    owner_ids, _ = pd.factorize(roots[unit_codes])
+    return contacts.assign(**{OWNER_ID: owner_ids.astype(np.int64)})
@@ -0,0 +1,32 @@
+import math
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+def page_controls(total, key, default_size=50, label="Rows per page"):
+    """Render page size and page number controls and return the (start, end) slice."""
+    cols = st.columns([1, 1, 2])
+    with cols[0]:
+        page_size = st.selectbox(
+            label,
+            PAGE_SIZES,
+            index=PAGE_SIZES.index(default_size),
+            key=f"{key}_page_size"
+        )
+
+    pages = max(math.ceil(total / page_size), 1)
+
+    # Keep the stored page inside the range when the data shrinks
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    with cols[1]:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    with cols[2]:
+        st.write(f"Showing {start + 1 if total else 0}-{end} of {total} (page {page} of {pages})")
+
+    return start, end
@@ -0,0 +1,72 @@
+from relations import CONTACT_KEY, owner_keys
+
+# Payloads sent per request in bulk mode
+DEFAULT_BULK_SIZE = 50
+
+# Payload field filled by each contact type
+PAYLOAD_FIELDS = {"phone_number": "phone_number", "email": "email"}
+
+def build_payload(contact_dict):
+    """Build the marketing API payload for one contact."""
+    # Create payload - always include all fields with empty strings instead of None
+    payload = {
+        "name": contact_dict["name"],
+        "address": contact_dict["address"],
+        "phone_number": "",  # Default to empty string instead of None
+        "email": ""          # Default to empty string instead of None
+    }
+
+    # Update with actual values if available
+    field = PAYLOAD_FIELDS.get(contact_dict["type"])
+    if field:
+        payload[field] = contact_dict["value"]
+
+    return payload
+
+def coalesce_payloads(contacts):
+    """
+    Merge each owner's contacts into the fewest payloads.
+
+    The n-th phone number and the n-th email of an owner about the same property
+    share a payload, so an owner with one of each costs one request instead of two.
+    A payload names a single property, so contacts from an owner's other parcels
+    are never merged into it. Returns a list of (payload, positions) pairs, where
+    positions are the rows of contacts the payload carries, in the order the
+    owners first appear.
+    """
+    if not len(contacts):
+        return []
+
+    df = contacts.reset_index(drop=True)
+    keys = owner_keys(df)
+    keys = keys if isinstance(keys, list) else [keys]
+    if CONTACT_KEY not in keys:
+        keys = keys + [CONTACT_KEY]
+    types = df["type"].astype(str)
+
+    # Contacts of a type a payload cannot carry are sent on their own
+    mergeable = types.isin(PAYLOAD_FIELDS.keys())
+    slot = df.groupby(keys + ["type"], sort=False, observed=True, dropna=False).cumcount()
+    slots = df[keys].astype(str).assign(slot=slot.where(mergeable, -1 - df.index.to_series()))
+    groups = slots.groupby(keys + ["slot"], sort=False, dropna=False).indices
+
+    records = df.to_dict('records')
+    payloads = []
+    for positions in groups.values():
+        payload = build_payload(records[positions[0]])
+        for position in positions[1:]:
+            field = PAYLOAD_FIELDS[records[position]["type"]]
+            payload[field] = records[position]["value"]
+        payloads.append((payload, list(positions)))
+
+    # Keep the order of the first contact of every payload
+    payloads.sort(key=lambda item: item[1][0])
+    return payloads
+
+def batch_payloads(payloads, size=DEFAULT_BULK_SIZE):
+    """Group (payload, positions) pairs into batches for bulk submission."""
+    return [
+        ([payload for payload, _ in payloads[start:start + size]],
+         [position for _, positions in payloads[start:start + size] for position in positions])
+        for start in range(0, len(payloads), size)
+    ]
@@ -0,0 +1,73 @@
+import csv
+import io
+import streamlit as st
+import pandas as pd
+
+# How much of the file is read for a preview
+DEFAULT_PREVIEW_KB = 64
+
+PREVIEW_DELIMITERS = ",;\t|"
+
+def read_head(file, max_kb=DEFAULT_PREVIEW_KB):
+    """
+    Read up to max_kb from the start of the file and restore the file position.
+
+    Returns the decoded text and the number of raw bytes read.
+    """
+    start = file.tell()
+    file.seek(0)
+    raw = file.read(max_kb * 1024)
+    file.seek(start)
+
+    if isinstance(raw, bytes):
+        return raw.decode("utf-8-sig", errors="replace"), len(raw)
+    return raw, len(raw.encode("utf-8"))
+
+def preview_csv(file, n_rows=5, max_kb=DEFAULT_PREVIEW_KB):
+    """
+    Preview a CSV from its first bytes only.
+
+    The first line is always read as the header, as the full read does. Returns
+    the first rows, the sniffed delimiter, and the total row count estimated from
+    the file size.
+    """
+    text, bytes_read = read_head(file, max_kb)
+    total_bytes = getattr(file, "size", None)
+    complete = total_bytes is None or bytes_read >= total_bytes
+
+    # Drop the trailing partial line when the file was cut off
+    if not complete and "\n" in text:
+        text = text[:text.rindex("\n") + 1]
+
+    # Sniff the delimiter, falling back to plain commas
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=PREVIEW_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ","
+
+    frame = pd.read_csv(io.StringIO(text), sep=delimiter, header=0, nrows=n_rows)
+
+    # Estimate the row count from the average width of the sampled rows
+    lines = text.count("\n") - 1
+    if complete:
+        estimated_rows = max(lines, 0)
+    else:
+        bytes_per_row = len(text.encode("utf-8")) / max(lines, 1)
+        estimated_rows = int(total_bytes / bytes_per_row) - 1
+
+    return {
+        "frame": frame,
+        "delimiter": delimiter,
+        "estimated_rows": estimated_rows,
+        "exact": complete
+    }
+
+def show_preview(file, n_rows=5):
+    """Render a quick preview of an uploaded CSV."""
+    result = preview_csv(file, n_rows)
+    rows_label = f"{result['estimated_rows']:,}" if result["exact"] else f"~{result['estimated_rows']:,}"
+    delimiter_label = "tab" if result["delimiter"] == "\t" else f"'{result['delimiter']}'"
+
+    st.write(f"Preview of first {n_rows} rows ({rows_label} rows, delimiter {delimiter_label}):")
+    st.dataframe(result["frame"], use_container_width=True)
+    return result
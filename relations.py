@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from owner_resolution import OWNER_ID
+
+# Contacts point at property rows through these columns
+PROPERTY_KEY = "Account Number"
+CONTACT_KEY = "id"
+
+def owner_keys(contacts):
+    """Return what contacts are grouped on into owners: the canonical owner id when resolved."""
+    return OWNER_ID if OWNER_ID in contacts.columns else [CONTACT_KEY, "name"]
+
+def build_relation(properties, contacts):
+    """Build the hash indexes linking property rows and contacts."""
+    # Account number -> position of its first property row
+    if properties is not None and PROPERTY_KEY in properties.columns:
+        keys = properties[PROPERTY_KEY].astype(str)
+        first = ~keys.duplicated().to_numpy()
+        property_index = pd.Series(np.flatnonzero(first), index=keys.to_numpy()[first])
+    else:
+        property_index = pd.Series([], dtype=np.intp)
+
+    contact_index = {}
+    owner_index = {}
+    if contacts is not None and not contacts.empty:
+        contact_index = contacts.groupby(CONTACT_KEY, sort=False, observed=True, dropna=False).indices
+        owner_index = contacts.groupby(owner_keys(contacts), sort=False, observed=True, dropna=False).indices
+
+    return {
+        "properties": properties,
+        "contacts": contacts,
+        "property_index": property_index,
+        "contact_index": contact_index,
+        "owner_index": owner_index
+    }
+
+def get_relation(properties, contacts, key="relation"):
+    """Return the relation for these frames, rebuilding it only when either frame changed."""
+    cached = st.session_state.get(key)
+    if cached is not None and cached["properties"] is properties and cached["contacts"] is contacts:
+        return cached
+
+    relation = build_relation(properties, contacts)
+    st.session_state[key] = relation
+    return relation
+
+def contact_positions(relation, property_id):
+    """Return the row positions of the contacts of a property."""
+    positions = relation["contact_index"].get(property_id)
+    return positions if positions is not None else np.array([], dtype=np.intp)
+
+def owner_positions(relation, owner):
+    """Return the row positions of the contacts of one owner."""
+    positions = relation["owner_index"].get(owner)
+    return positions if positions is not None else np.array([], dtype=np.intp)
+
+def contacts_for(relation, property_id, contacts=None):
+    """Return the contacts of a property without scanning the frame."""
+    contacts = relation["contacts"] if contacts is None else contacts
+    return contacts.iloc[contact_positions(relation, property_id)]
+
+def contacts_for_owner(relation, owner, contacts=None):
+    """Return the contacts of one owner, which may span several properties."""
+    contacts = relation["contacts"] if contacts is None else contacts
+    return contacts.iloc[owner_positions(relation, owner)]
+
+def property_for(relation, property_id):
+    """Return the property row a contact belongs to, or None when it is not linked."""
+    properties = relation["properties"]
+    if properties is None:
+        return None
+    position = relation["property_index"].get(str(property_id))
+    return properties.iloc[position] if position is not None else None
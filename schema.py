@@ -0,0 +1,93 @@
+import pandas as pd
+
+# Arrow-backed strings store repeated text far more compactly than object dtype
+STRING = pd.StringDtype("pyarrow")
+CATEGORY = "category"
+
+# Property frame columns and the dtype each one is stored as
+PROPERTY_SCHEMA = {
+    "Account Number": STRING,
+    "Account Status": CATEGORY,
+    "Owner Name": STRING,
+    "Property Address": STRING,
+    "Owner Address": STRING,
+    "Billing Address": STRING,
+    "Balance Amount": "float64",
+    "Assessed Value": "float64",
+    "Tax Yr": "Int64",
+    "Roll Yr": "Int64",
+    "Alternate Key": "Int64",
+    "Bidder #": "Int64",
+    "Cert #": "Int64",
+    "Cert Status": STRING,
+    "Deed Status": STRING,
+    "Millage Code": STRING,
+}
+
+# Contact frame columns and the dtype each one is stored as
+CONTACT_SCHEMA = {
+    "id": STRING,
+    "name": CATEGORY,
+    "address": CATEGORY,
+    "current_address": STRING,
+    "type": CATEGORY,
+    "value": STRING,
+}
+
+# Values that must always be valid for a categorical column, even if unseen in the data
+KNOWN_CATEGORIES = {
+    "Account Status": ["Unpaid", "Paid", "Pending"],
+    "type": ["phone_number", "email"],
+}
+
+NUMERIC_DTYPES = {"float64", "Int64"}
+
+def coerce_numeric(values, dtype):
+    """Coerce a column to a numeric dtype, stripping currency formatting."""
+    if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+        values = values.astype(str).str.replace(r"[$,]", "", regex=True)
+    numeric = pd.to_numeric(values, errors="coerce")
+    if dtype == "Int64":
+        numeric = numeric.round()
+    return numeric.astype(dtype)
+
+def coerce_category(values, col):
+    """Convert a column to a categorical that also admits the known values."""
+    values = values.astype(CATEGORY)
+    missing = [v for v in KNOWN_CATEGORIES.get(col, []) if v not in values.cat.categories]
+    if missing:
+        values = values.cat.add_categories(missing)
+    return values
+
+def apply_schema(df, schema, categorize=True):
+    """
+    Return the frame with every known column converted to its compact dtype.
+
+    Unknown columns are left as they are. With categorize=False, categorical
+    columns are stored as Arrow strings instead, which keeps separately parsed
+    chunks concatenable.
+    """
+    if df is None:
+        return None
+
+    converted = {}
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+
+        values = df[col]
+        if dtype == CATEGORY and not categorize:
+            dtype = STRING
+
+        if dtype == CATEGORY:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                converted[col] = coerce_category(values, col)
+        elif str(dtype) in NUMERIC_DTYPES:
+            if str(values.dtype) != str(dtype):
+                converted[col] = coerce_numeric(values, dtype)
+        elif values.dtype != dtype:
+            converted[col] = values.astype(dtype)
+
+    if not converted:
+        return df
+    return df.assign(**converted)
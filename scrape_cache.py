@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+import pandas as pd
+from schema import CONTACT_SCHEMA, apply_schema
+
+# Location of the on-disk cache of scraped contacts
+SCRAPE_CACHE_PATH = os.environ.get(
+    "SCRAPE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrape_cache.sqlite")
+)
+
+# How long scraped results stay fresh
+DEFAULT_TTL_DAYS = 30
+
+# Property columns that identify a parcel and its owner
+IDENTITY_COLUMNS = ["Account Number", "Owner Name", "Property Address"]
+
+CONTACT_COLUMNS = ["id", "name", "address", "current_address", "type", "value"]
+
+def connect(path=SCRAPE_CACHE_PATH):
+    """Open the cache database, creating the tables on first use."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS properties (
+            fingerprint INTEGER PRIMARY KEY,
+            account TEXT,
+            fetched_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS contacts (
+            fingerprint INTEGER,
+            id TEXT,
+            name TEXT,
+            address TEXT,
+            current_address TEXT,
+            type TEXT,
+            value TEXT
+        );
+        CREATE INDEX IF NOT EXISTS contacts_fingerprint ON contacts (fingerprint);
+    """)
+    return conn
+
+def normalize_text(values):
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return (
+        values.astype(str)
+        .str.lower()
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.split()
+        .str.join(" ")
+    )
+
+def property_fingerprints(properties):
+    """Return one int64 fingerprint per property from its account, owner and address."""
+    parts = pd.DataFrame(index=properties.index)
+    for col in IDENTITY_COLUMNS:
+        if col in properties.columns:
+            parts[col] = normalize_text(properties[col].fillna(""))
+        else:
+            parts[col] = ""
+
+    # Account numbers are compared without separators
+    parts["Account Number"] = parts["Account Number"].str.replace(r"[\s\-]", "", regex=True)
+
+    hashes = pd.util.hash_pandas_object(parts, index=False).to_numpy()
+    return pd.Series(hashes.view("int64"), index=properties.index)
+
+def fresh_fingerprints(conn, fingerprints, ttl_days):
+    """Return the subset of fingerprints that have results newer than the TTL."""
+    cutoff = time.time() - ttl_days * 24 * 60 * 60
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (fingerprint INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM wanted")
+    conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((int(fp),) for fp in fingerprints))
+    rows = conn.execute(
+        "SELECT p.fingerprint FROM properties p JOIN wanted w ON p.fingerprint = w.fingerprint WHERE p.fetched_at >= ?",
+        (cutoff,)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+def split_cached(properties, ttl_days=DEFAULT_TTL_DAYS, path=SCRAPE_CACHE_PATH):
+    """
+    Split properties into those with fresh cached results and those to scrape.
+
+    Returns the cached contacts, the properties that still need scraping, and the
+    fingerprints of those properties keyed by account number.
+    """
+    fingerprints = property_fingerprints(properties)
+    with closing(connect(path)) as conn:
+        fresh = fresh_fingerprints(conn, fingerprints.unique(), ttl_days)
+        cached = pd.read_sql_query(
+            f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contacts WHERE fingerprint IN (SELECT fingerprint FROM wanted) "
+            "AND fingerprint IN (SELECT fingerprint FROM properties WHERE fetched_at >= ?)",
+            conn,
+            params=(time.time() - ttl_days * 24 * 60 * 60,)
+        )
+
+    is_miss = ~fingerprints.isin(fresh)
+    misses = properties[is_miss]
+    accounts = misses["Account Number"].astype(str) if "Account Number" in misses.columns else misses.index.astype(str)
+    by_account = pd.Series(fingerprints[is_miss].to_numpy(), index=accounts.to_numpy())
+
+    return apply_schema(cached, CONTACT_SCHEMA), misses, by_account
+
+def store_results(results, fingerprints_by_account, path=SCRAPE_CACHE_PATH):
+    """Store fresh scrape results, replacing older results for the same properties."""
+    if fingerprints_by_account is None or fingerprints_by_account.empty:
+        return 0
+
+    fingerprints_by_account = fingerprints_by_account[~fingerprints_by_account.index.duplicated()]
+    now = time.time()
+
+    # Link each contact to its property through the account number
+    contacts = results.reindex(columns=CONTACT_COLUMNS).astype(object)
+    contacts = contacts.where(contacts.notna(), None)
+    positions = fingerprints_by_account.index.get_indexer(contacts["id"].astype(str))
+    linked = positions != -1
+    contact_prints = fingerprints_by_account.to_numpy()[positions[linked]]
+
+    with closing(connect(path)) as conn, conn:
+        fingerprints = [int(fp) for fp in fingerprints_by_account.to_numpy()]
+        conn.executemany("DELETE FROM contacts WHERE fingerprint = ?", ((fp,) for fp in fingerprints))
+        conn.executemany(
+            "INSERT OR REPLACE INTO properties VALUES (?, ?, ?)",
+            ((fp, account, now) for account, fp in zip(fingerprints_by_account.index, fingerprints))
+        )
+        conn.executemany(
+            f"INSERT INTO contacts VALUES (?, {', '.join('?' for _ in CONTACT_COLUMNS)})",
+            ((int(fp), *row) for fp, row in zip(contact_prints, contacts[linked].itertuples(index=False)))
+        )
+
+    return int(linked.sum())
+
+def clear_cache(path=SCRAPE_CACHE_PATH):
+    """Remove every cached result."""
+    with closing(connect(path)) as conn, conn:
+        conn.execute("DELETE FROM contacts")
+        conn.execute("DELETE FROM properties")
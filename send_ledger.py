@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from contact_normalize import normalize_values
+
+# Location of the on-disk ledger of every contact ever messaged
+SEND_LEDGER_PATH = os.environ.get(
+    "SEND_LEDGER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "send_ledger.sqlite")
+)
+
+# Contacts messaged within this many days are skipped
+DEFAULT_WINDOW_DAYS = 30
+
+# Bloom filter size per stored contact and number of bits set per contact
+BLOOM_BITS_PER_ITEM = 10
+BLOOM_HASHES = 7
+
+# path -> [bit array, number of contacts it was sized for, number of contacts
+# added to it]; kept per process and updated by record_sends, the only writer
+# of the ledger, so the database is only counted when the filter is rebuilt
+_blooms = {}
+_bloom_lock = threading.Lock()
+
+def connect(path=SEND_LEDGER_PATH):
+    """Open the ledger database, creating the table on first use."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS sends (
+            contact_hash INTEGER PRIMARY KEY,
+            value TEXT,
+            last_sent REAL
+        );
+    """)
+    return conn
+
+def contact_keys(contacts):
+    """Return the normalized value of each contact, falling back to the trimmed lowercase text."""
+    values = contacts["value"].astype("string")
+    normalized = normalize_values(contacts["type"].astype(str), values)
+    return normalized.fillna(values.str.strip().str.lower()).fillna("")
+
+def hash_keys(keys):
+    """Return one int64 hash per contact key."""
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy().view(np.int64)
+
+def contact_hashes(contacts):
+    """Return one int64 hash per contact of its normalized value."""
+    return hash_keys(contact_keys(contacts))
+
+def bloom_positions(hashes, size):
+    """Return the bloom filter bit positions of each hash, one column per hash function."""
+    hashes = np.asarray(hashes).view(np.uint64)
+    first = hashes & np.uint64(0xFFFFFFFF)
+    second = (hashes >> np.uint64(32)) | np.uint64(1)
+    steps = np.arange(BLOOM_HASHES, dtype=np.uint64)
+    return ((first[:, None] + steps[None, :] * second[:, None]) % np.uint64(size)).astype(np.intp)
+
+def build_bloom(conn):
+    """Build a bloom filter over every contact in the ledger, sized with room to grow."""
+    stored = np.fromiter((row[0] for row in conn.execute("SELECT contact_hash FROM sends")), dtype=np.int64)
+    capacity = max(2 * len(stored), 1024)
+    bits = np.zeros(capacity * BLOOM_BITS_PER_ITEM, dtype=bool)
+    if len(stored):
+        bits[bloom_positions(stored, len(bits)).ravel()] = True
+    return [bits, capacity, len(stored)]
+
+def get_bloom(conn, path):
+    """Return the bloom filter of a ledger, rebuilding it once it holds more contacts than it was sized for."""
+    with _bloom_lock:
+        cached = _blooms.get(path)
+        if cached is None or cached[2] > cached[1]:
+            cached = build_bloom(conn)
+            _blooms[path] = cached
+        return cached[0]
+
+def recently_contacted(contacts, window_days=DEFAULT_WINDOW_DAYS, use_bloom=True, path=SEND_LEDGER_PATH):
+    """
+    Return a boolean array marking contacts messaged within the window.
+
+    The bloom filter rules out contacts never messaged without touching the
+    database; only the possible matches are looked up in the ledger.
+    """
+    hashes = contact_hashes(contacts)
+    recent = np.zeros(len(hashes), dtype=bool)
+    if not len(hashes):
+        return recent
+
+    with closing(connect(path)) as conn:
+        candidates = np.ones(len(hashes), dtype=bool)
+        if use_bloom:
+            bits = get_bloom(conn, path)
+            candidates = bits[bloom_positions(hashes, len(bits))].all(axis=1)
+        if not candidates.any():
+            return recent
+
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (contact_hash INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM wanted")
+        conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((int(h),) for h in hashes[candidates]))
+        cutoff = time.time() - window_days * 24 * 60 * 60
+        found = np.fromiter(
+            (row[0] for row in conn.execute(
+                "SELECT s.contact_hash FROM sends s JOIN wanted w ON s.contact_hash = w.contact_hash WHERE s.last_sent >= ?",
+                (cutoff,)
+            )),
+            dtype=np.int64
+        )
+
+    recent[candidates] = np.isin(hashes[candidates], found)
+    return recent
+
+def record_sends(contacts, path=SEND_LEDGER_PATH, conn=None):
+    """
+    Record contacts as messaged now.
+
+    Pass an open connection to record many small batches during a send without
+    reopening the ledger each time.
+    """
+    if contacts.empty:
+        return 0
+    if conn is None:
+        with closing(connect(path)) as conn:
+            return record_sends(contacts, path, conn)
+
+    keys = contact_keys(contacts)
+    hashes = hash_keys(keys)
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sends VALUES (?, ?, ?)",
+            ((int(h), key, now) for h, key in zip(hashes, keys.to_numpy(dtype=object)))
+        )
+
+    # Keep a cached bloom filter in step with the ledger; contacts sent before
+    # are counted again, which only brings the next rebuild forward
+    bits = get_bloom(conn, path)
+    with _bloom_lock:
+        bits[bloom_positions(hashes, len(bits)).ravel()] = True
+        _blooms[path][2] += len(hashes)
+    return len(hashes)
@@ -0,0 +1,63 @@
+import pandas as pd
+import streamlit as st
+
+# Frames handed between steps share their buffers; a write copies only the columns it touches
+pd.set_option("mode.copy_on_write", True)
+
+def view(df):
+    """Return a cheap copy-on-write view of a frame that can be modified safely."""
+    if df is None:
+        return None
+    return df.copy(deep=False)
+
+def session_frames():
+    """Return the session state keys that currently hold a DataFrame."""
+    return {
+        key: value for key, value in st.session_state.items()
+        if isinstance(value, pd.DataFrame)
+    }
+
+def frame_refcounts(frames=None):
+    """Count how many session keys reference each frame."""
+    frames = session_frames() if frames is None else frames
+    counts = {}
+    for df in frames.values():
+        counts[id(df)] = counts.get(id(df), 0) + 1
+    return counts
+
+def memory_report():
+    """
+    Report memory per session key.
+
+    Keys holding the same frame are listed together and counted once in the total.
+    """
+    frames = session_frames()
+    refcounts = frame_refcounts(frames)
+    sizes = {}
+    rows = []
+
+    for key, df in sorted(frames.items()):
+        if id(df) not in sizes:
+            sizes[id(df)] = df.memory_usage(deep=True).sum() / (1024 * 1024)
+        shared_with = [other for other, frame in frames.items() if frame is df and other != key]
+        rows.append({
+            "key": key,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "memory_mb": round(sizes[id(df)], 2),
+            "refs": refcounts[id(df)],
+            "shared_with": ", ".join(sorted(shared_with))
+        })
+
+    report = pd.DataFrame(rows, columns=["key", "rows", "columns", "memory_mb", "refs", "shared_with"])
+    total_mb = sum(sizes.values())
+    return report, total_mb
+
+def show_memory_report():
+    """Render the per-key memory report."""
+    report, total_mb = memory_report()
+    if report.empty:
+        st.write("No data frames in this session.")
+        return
+    st.dataframe(report, use_container_width=True, hide_index=True)
+    st.write(f"Total: {total_mb:.1f} MB across {len(frame_refcounts())} distinct frames")
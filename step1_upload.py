@@ -6,10 +6,14 @@ import time
 import tempfile
 import os
 from utils import navigation_buttons
+from diff_engine import check_new_rows_local
+from ingest import read_csv_chunked, DEFAULT_MEMORY_BUDGET_MB
+from preview import show_preview
+from schema import PROPERTY_SCHEMA, CONTACT_SCHEMA, apply_schema
 
 def get_sample_data():
     """Return sample property data for testing."""
-    return pd.DataFrame({
+    return apply_schema(pd.DataFrame({
         "Account Number": ["TEST-00-00-0000-00000"],
         "Account Status": ["Unpaid"],
         "Owner Name": ["Test Owner"],
@@ -21,60 +25,69 @@ def get_sample_data():
         "Cert Status": ["Pending"],
         "Deed Status": ["-- None --"],
         "Alternate Key": [12345]
-    })
+    }), PROPERTY_SCHEMA)
 
-def process_files(file1, file2):
-    """Process files using the API."""
+def process_files(file1, file2, local=False):
+    """Process files using the API, or the local diff engine when requested."""
     API_ENDPOINT = "https://llmmsi.a.pinggy.link/pc-house-automation/check_new_rows"
     
     try:
-        with st.spinner("Calling API to process files..."):
-            # Prepare files for upload
-            files = {
-                'file1': file1,
-                'file2': file2
-            }
-            
-            # Make API request
-            response = requests.post(API_ENDPOINT, files=files)
-            
-            # Check response
-            if response.status_code == 200:
-                data = response.json()
+        if local:
+            with st.spinner("Comparing files locally..."):
+                data = check_new_rows_local(file1, file2)
+        else:
+            with st.spinner("Calling API to process files..."):
+                # Prepare files for upload
+                files = {
+                    'file1': file1,
+                    'file2': file2
+                }
                 
-                # Log response for debugging
-                st.write(f"Received {data['count']} records from API")
+                # Make API request
+                response = requests.post(API_ENDPOINT, files=files)
                 
-                # Set session state with JSON data from response
-                st.session_state.data = pd.DataFrame(data['json'])
-                st.session_state.raw_csv = data['csv']
+                # Check response
+                if response.status_code != 200:
+                    st.error(f"API Error: Status code {response.status_code}")
+                    st.error(f"Response: {response.text}")
+                    return False
                 
-                st.success(f"Successfully processed {data['count']} property records!")
-                time.sleep(1)
-                st.session_state.step = 2
-                st.rerun()
-                return True
-            else:
-                st.error(f"API Error: Status code {response.status_code}")
-                st.error(f"Response: {response.text}")
-                return False
+                data = response.json()
+        
+        # Log response for debugging
+        st.write(f"Received {data['count']} records from {'local comparison' if local else 'API'}")
+        
+        # Set session state with JSON data from response
+        st.session_state.data = apply_schema(pd.DataFrame(data['json']), PROPERTY_SCHEMA)
+        
+        st.success(f"Successfully processed {data['count']} property records!")
+        time.sleep(1)
+        st.session_state.step = 2
+        st.rerun()
+        return True
                 
     except Exception as e:
         st.error(f"Error processing files: {str(e)}")
         return False
 
-def process_direct_diff(diff_file):
+def process_direct_diff(diff_file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """Process the differences file directly for scraping."""
     try:
         with st.spinner("Processing differences file..."):
-            # Read the CSV
-            df = pd.read_csv(diff_file)
+            # Read the CSV in bounded chunks
+            progress = st.progress(0.0)
+            df, stats = read_csv_chunked(diff_file, memory_budget_mb, on_progress=progress.progress)
+            progress.progress(1.0)
             
             # Set the data in session state
             st.session_state.data = df
             
+            # Report values that could not be coerced
+            for col, count in stats["coerced"].items():
+                st.warning(f"{count} invalid values in '{col}' were set to empty")
+            
             # Display a success message
-            st.success(f"Successfully loaded {len(df)} records from differences file!")
+            st.success(f"Successfully loaded {len(df)} records from differences file in {stats['chunks']} chunks!")
             
             # Option to proceed directly to scraping
             cols = st.columns([3, 3])
@@ -142,7 +155,7 @@ def manual_data_entry():
                 "Deed Status": "-- None --"
             }])
             
-            st.session_state.data = manual_df
+            st.session_state.data = apply_schema(manual_df, PROPERTY_SCHEMA)
             st.success("Manual data added!")
             
             if not add_another:
@@ -169,16 +182,24 @@ def upload_differences_file():
         
         # Preview button
         if st.button("Preview Differences File"):
-            # Read and display a preview
-            df = pd.read_csv(diff_file)
-            st.write("Preview of first 5 rows:")
-            st.dataframe(df.head(5), use_container_width=True)
+            # Read only the head of the file for the preview
+            show_preview(diff_file)
+        
+        # Memory budget for the chunked reader
+        memory_budget_mb = st.number_input(
+            "Memory budget per chunk (MB)",
+            min_value=16,
+            max_value=4096,
+            value=DEFAULT_MEMORY_BUDGET_MB,
+            step=16,
+            help="Large files are read in chunks that fit within this budget"
+        )
         
         # Process button enabled when file is uploaded
         process_button = st.button("Process Differences File", type="primary")
         
         if process_button:
-            return process_direct_diff(diff_file)
+            return process_direct_diff(diff_file, memory_budget_mb)
     
     return False
 
@@ -198,11 +219,19 @@ def csv_upload():
         if file2:
             st.success("Second CSV uploaded!")
     
+    # Comparison mode
+    compare_mode = st.radio(
+        "Comparison mode",
+        ["Remote API", "Local (fast)"],
+        horizontal=True,
+        help="Local mode compares the files on this machine instead of uploading them through the tunnel"
+    )
+    
     # Process button enabled only when files are uploaded
     process_button = st.button("Process Files", disabled=(not file1 or not file2))
     
     if process_button:
-        return process_files(file1, file2)
+        return process_files(file1, file2, local=(compare_mode == "Local (fast)"))
     
     return False
 
@@ -233,6 +262,7 @@ def show():
                     "value": ["(111) 111-1111", "test@test.com"],
                     "selected": [True, True]
                 })
+                st.session_state.final_data = apply_schema(st.session_state.final_data, CONTACT_SCHEMA)
             
             # Force rerun to refresh
             st.rerun()
@@ -1,6 +1,69 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from utils import navigation_buttons
+from schema import PROPERTY_SCHEMA, apply_schema
+from pager import page_controls
+from export import EXPORT_FORMATS, export_bytes
+from edit_journal import (
+    new_journal, journal_size, record_page_edits, add_row,
+    visible_row_keys, journal_page, apply_journal
+)
+
+def get_review_frame():
+    """Return the frame under review, starting over when new data was loaded."""
+    if st.session_state.get("review_base") is not st.session_state.data or st.session_state.selected_data is None:
+        frame = st.session_state.data
+        
+        # Edits are recorded by row key, so keys must be unique integers
+        if not (frame.index.is_unique and pd.api.types.is_integer_dtype(frame.index)):
+            frame = frame.reset_index(drop=True)
+        
+        st.session_state.review_base = st.session_state.data
+        st.session_state.selected_data = frame
+        st.session_state.review_journal = new_journal(int(frame.index.max()) + 1 if len(frame) else 0)
+        st.session_state.review_version = st.session_state.get("review_version", 0) + 1
+    
+    return st.session_state.selected_data
+
+def get_reviewed_data():
+    """Return the reviewed data for later steps, applying pending edits once."""
+    if st.session_state.data is None:
+        return None
+    if st.session_state.get("review_base") is not st.session_state.data or st.session_state.selected_data is None:
+        return st.session_state.data
+    
+    journal = st.session_state.get("review_journal")
+    if journal_size(journal):
+        st.session_state.selected_data = apply_journal(st.session_state.selected_data, journal)
+        st.session_state.review_journal = new_journal(journal["next_key"])
+        # Editor state refers to the old pages, so start the editors fresh
+        st.session_state.review_version = st.session_state.get("review_version", 0) + 1
+    
+    return st.session_state.selected_data
+
+def visible_keys(frame, search, sort_column, ascending):
+    """Return the row keys that match the search, in sort order."""
+    cached = st.session_state.get("review_view_cache")
+    if cached is not None and cached[0] is frame and cached[1] == (search, sort_column, ascending):
+        return cached[2]
+    
+    keys = frame.index
+    
+    # Filter on every text column
+    if search:
+        mask = np.zeros(len(frame), dtype=bool)
+        for col in frame.columns:
+            values = frame[col]
+            if values.dtype == object or isinstance(values.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+                mask |= values.astype(str).str.contains(search, case=False, regex=False, na=False).to_numpy()
+        keys = keys[mask]
+    
+    if sort_column:
+        keys = frame.loc[keys, sort_column].sort_values(ascending=ascending, kind="stable", na_position="last").index
+    
+    st.session_state.review_view_cache = (frame, (search, sort_column, ascending), keys)
+    return keys
 
 def show():
     """Display the review and edit data step."""
@@ -27,7 +90,7 @@ def show():
             submitted = st.form_submit_button("Add Property Data")
             
             if submitted:
-                st.session_state.data = pd.DataFrame({
+                st.session_state.data = apply_schema(pd.DataFrame({
                     "Account Number": [acct_num if acct_num else "00-00-00-0000-00000"],
                     "Account Status": [status],
                     "Owner Name": [owner_name if owner_name else "New Owner"],
@@ -36,7 +99,7 @@ def show():
                     "Assessed Value": [350000],
                     "Tax Yr": [2023],
                     "Roll Yr": [2023]
-                })
+                }), PROPERTY_SCHEMA)
                 st.success("Property data added successfully!")
                 st.experimental_rerun()
     else:
@@ -44,8 +107,10 @@ def show():
         st.markdown("### Property Tax Certificate Data")
         st.write("You can add, edit, or delete rows as needed.")
         
+        review_data = get_review_frame()
+        
         # Get the column names from the dataframe
-        columns = st.session_state.data.columns.tolist()
+        columns = review_data.columns.tolist()
         
         # Create column config based on data columns
         column_config = {}
@@ -78,17 +143,54 @@ def show():
                 format="$%.2f"
             )
         
+        # Search and sort run over the full dataset, only the current page is sent to the browser
+        cols = st.columns([2, 1, 1])
+        with cols[0]:
+            search = st.text_input("Search", key="review_search", placeholder="Filter rows containing...")
+        with cols[1]:
+            sort_column = st.selectbox("Sort by", [None] + columns, key="review_sort_column",
+                                       format_func=lambda col: "(original order)" if col is None else col)
+        with cols[2]:
+            ascending = st.radio("Order", ["Ascending", "Descending"], key="review_sort_order") == "Ascending"
+        
+        journal = st.session_state.review_journal
+        keys = visible_row_keys(visible_keys(review_data, search, sort_column, ascending), journal)
+        start, end = page_controls(len(keys), "review")
+        page_keys = keys[start:end]
+        
+        # A new editor key per page and view so edits never land on the wrong rows
+        view_signature = abs(hash((search, sort_column, ascending))) % 10 ** 8
+        editor_key = f"review_editor_{st.session_state.get('review_version', 0)}_{start}_{view_signature}"
+        
+        # The editor widget id covers its data, so the page it shows stays fixed while
+        # the editor has state; recorded edits are overlaid only when it starts fresh
+        editor_inputs = st.session_state.get("review_editor_inputs") or {}
+        page = editor_inputs.get(editor_key)
+        if editor_key not in st.session_state or page is None or not page.index.equals(page_keys):
+            page = journal_page(review_data, journal, page_keys)
+            editor_inputs = {editor_key: page}
+        st.session_state.review_editor_inputs = editor_inputs
+        
         # Create the data editor with the configured columns
-        edited_data = st.data_editor(
-            st.session_state.data, 
+        st.data_editor(
+            page, 
             num_rows="dynamic",
             column_config=column_config,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            key=editor_key
         )
         
-        # Save the edited data
-        st.session_state.selected_data = edited_data
+        # Record only the changed cells and rows, later steps apply them when they read the data
+        structural = record_page_edits(journal, review_data, page, st.session_state.get(editor_key) or {})
+        if structural:
+            # Added or deleted rows reset the editor so they are not recorded twice
+            st.session_state.review_version = st.session_state.get("review_version", 0) + 1
+            st.rerun()
+        
+        pending = journal_size(journal)
+        if pending:
+            st.caption(f"{pending} pending change(s) will be applied when the data is used in the next step.")
         
         # Add property data manually option
         with st.expander("Add Property Data Manually"):
@@ -113,28 +215,18 @@ def show():
                 
                 if submitted:
                     # Create new record with fields matching our data structure
-                    new_record = pd.DataFrame({
-                        "Account Number": [new_acct_num if new_acct_num else "00-00-00-0000-00000"],
-                        "Account Status": [new_status],
-                        "Owner Name": [new_owner if new_owner else "New Owner"],
-                        "Property Address": [new_address if new_address else "Unknown Address"],
-                        "Balance Amount": [new_balance],
-                        "Assessed Value": [350000],  # Default value
-                        "Tax Yr": [2023],
-                        "Roll Yr": [2023],
-                        "Cert Status": ["Pending"],
-                        "Deed Status": ["-- None --"]
+                    add_row(journal, {
+                        "Account Number": new_acct_num if new_acct_num else "00-00-00-0000-00000",
+                        "Account Status": new_status,
+                        "Owner Name": new_owner if new_owner else "New Owner",
+                        "Property Address": new_address if new_address else "Unknown Address",
+                        "Balance Amount": new_balance,
+                        "Assessed Value": 350000,  # Default value
+                        "Tax Yr": 2023,
+                        "Roll Yr": 2023,
+                        "Cert Status": "Pending",
+                        "Deed Status": "-- None --"
                     })
-                    
-                    # Add any missing columns from the original data
-                    for col in edited_data.columns:
-                        if col not in new_record.columns:
-                            new_record[col] = None
-                    
-                    # Append to existing data
-                    updated_data = pd.concat([edited_data, new_record], ignore_index=True)
-                    st.session_state.data = updated_data
-                    st.session_state.selected_data = updated_data
                     st.success("Property record added successfully!")
                     st.experimental_rerun()
     
@@ -144,23 +236,21 @@ def show():
             col1, col2 = st.columns(2)
             
             with col1:
-                if st.button("Export as CSV"):
-                    csv = st.session_state.data.to_csv(index=False)
-                    st.download_button(
-                        label="Download CSV",
-                        data=csv,
-                        file_name="processed_data.csv",
-                        mime="text/csv",
-                    )
+                export_format = st.selectbox("Export format", list(EXPORT_FORMATS.keys()), key="export_format")
+                if st.button("Prepare Export"):
+                    st.session_state.export_requested = export_format
             
+            # Exports are cached by content, so unchanged data is only serialized once per format
             with col2:
-                if st.button("Export as JSON"):
-                    json_str = st.session_state.data.to_json(orient="records")
+                if st.session_state.get("export_requested") == export_format:
+                    file_name, mime = EXPORT_FORMATS[export_format]
+                    with st.spinner(f"Preparing {export_format} export..."):
+                        export_data = export_bytes(get_reviewed_data(), export_format)
                     st.download_button(
-                        label="Download JSON",
-                        data=json_str,
-                        file_name="processed_data.json",
-                        mime="application/json",
+                        label=f"Download {export_format}",
+                        data=export_data,
+                        file_name=file_name,
+                        mime=mime,
                     )
     
     # Navigation buttons
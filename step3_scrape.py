@@ -2,8 +2,20 @@ import streamlit as st
 import pandas as pd
 import requests
 import time
-import tempfile
+import gzip
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.filepost import encode_multipart_formdata
+from schema import CONTACT_SCHEMA, apply_schema
+from step2_review import get_reviewed_data
+from job_poller import start_polling, get_job_state, update_job, poll_now, forget_job
+from scrape_cache import DEFAULT_TTL_DAYS, split_cached, store_results
+from ingest import read_csv_chunked
+from relations import get_relation, property_for
+from contact_selection import with_row_ids
+from owner_resolution import resolve_owners
+from column_plan import add_column, drop_column, added_columns, apply_column_plan
 
 # API endpoints
 API_BASE_URL = "http://llmmsi.a.pinggy.link/house-screenscraper/api"
@@ -11,6 +23,24 @@ UPLOAD_ENDPOINT = f"{API_BASE_URL}/upload"
 JOB_STATUS_ENDPOINT = f"{API_BASE_URL}/job"
 DOWNLOAD_ENDPOINT = f"{API_BASE_URL}/download"
 
+# Timeout for status and result requests
+REQUEST_TIMEOUT = 30
+
+# Where result downloads are kept until they are parsed, so they can resume
+RESULTS_DIR = os.path.join(tempfile.gettempdir(), "house-scrape-results")
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+RESULTS_MEMORY_BUDGET_MB = 64
+
+# Longest wait between automatic page refreshes while a job is running
+AUTO_REFRESH_MAX_SECONDS = 30
+
+# Rows per scrape job and how many jobs are submitted at once
+DEFAULT_BATCH_SIZE = 500
+MAX_SUBMIT_WORKERS = 4
+
+# Compression level for gzip-encoded uploads
+UPLOAD_GZIP_LEVEL = 6
+
 def get_sample_scraped_data():
     """Return sample scraped data."""
     import pandas as pd
@@ -26,13 +56,59 @@ def get_sample_scraped_data():
         "selected": [True, True, True]
     })
     
-    return sample_data
+    return apply_schema(sample_data, CONTACT_SCHEMA)
+
+def fetch_job_status(job_id):
+    """Fetch the status of a job; raises on network errors."""
+    response = requests.get(f"{JOB_STATUS_ENDPOINT}/{job_id}", timeout=REQUEST_TIMEOUT)
+    return response.json() if response.status_code == 200 else None
+
+def download_job_results(job_id):
+    """Stream the CSV results of a job to a local file, resuming an interrupted download."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{job_id}.csv")
+    partial = f"{path}.part"
+    if os.path.exists(path):
+        return path
+    
+    # Ask only for the bytes we do not have yet
+    offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    
+    with requests.get(f"{DOWNLOAD_ENDPOINT}/{job_id}/csv", headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        if response.status_code == 416:
+            # The partial file already holds everything
+            pass
+        elif response.status_code in [200, 206]:
+            # A 200 means the server ignored the range, so start over
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(partial, mode) as file:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    file.write(chunk)
+        else:
+            raise ValueError(f"Status code {response.status_code}")
+    
+    os.replace(partial, path)
+    return path
+
+def fetch_job_results(job_id):
+    """Fetch the results of a completed job as a DataFrame; raises on errors."""
+    path = download_job_results(job_id)
+    
+    # Parse in bounded, typed chunks
+    if os.path.getsize(path) == 0:
+        results_df = apply_schema(pd.DataFrame(columns=list(CONTACT_SCHEMA)), CONTACT_SCHEMA)
+    else:
+        with open(path, "rb") as file:
+            results_df, _ = read_csv_chunked(file, RESULTS_MEMORY_BUDGET_MB, schema=CONTACT_SCHEMA)
+    
+    os.remove(path)
+    return results_df
 
 def check_job_status(job_id):
     """Check the status of a specific job."""
     try:
-        response = requests.get(f"{JOB_STATUS_ENDPOINT}/{job_id}")
-        return response.json() if response.status_code == 200 else None
+        return fetch_job_status(job_id)
     except Exception as e:
         st.error(f"Error checking job status: {str(e)}")
         return None
@@ -40,12 +116,79 @@ def check_job_status(job_id):
 def get_job_results(job_id):
     """Get the results of a completed job."""
     try:
-        response = requests.get(f"{DOWNLOAD_ENDPOINT}/{job_id}/json")
-        return response.json() if response.status_code == 200 else None
+        return fetch_job_results(job_id)
     except Exception as e:
         st.error(f"Error getting job results: {str(e)}")
         return None
 
+def build_upload_body(scrape_df, compress=False):
+    """Serialize properties straight into an in-memory multipart body, gzip-encoded if requested."""
+    csv_bytes = scrape_df.to_csv(index=False).encode("utf-8")
+    body, content_type = encode_multipart_formdata({'file': ('properties.csv', csv_bytes, 'text/csv')})
+    headers = {'Content-Type': content_type}
+    
+    if compress:
+        body = gzip.compress(body, compresslevel=UPLOAD_GZIP_LEVEL)
+        headers['Content-Encoding'] = 'gzip'
+    
+    return body, headers, len(csv_bytes)
+
+def upload_scrape_file(scrape_df, compress=False):
+    """Upload one CSV of properties to the scraper and return the job information."""
+    body, headers, csv_size = build_upload_body(scrape_df, compress)
+    
+    # Make API request
+    response = requests.post(UPLOAD_ENDPOINT, data=body, headers=headers)
+    
+    # Check response
+    if response.status_code not in [200, 202]:
+        return {'job_id': None, 'status': 'error', 'message': f"API Error {response.status_code}: {response.text}"}
+    
+    result = response.json()
+    return {
+        'job_id': result.get('job_id'),
+        'status': result.get('status'),
+        'message': result.get('message'),
+        'upload_bytes': len(body),
+        'csv_bytes': csv_size
+    }
+
+def submit_scrape_batches(scrape_df, batch_size=DEFAULT_BATCH_SIZE, max_workers=MAX_SUBMIT_WORKERS, compress=False):
+    """Split the properties into batches and submit them concurrently, keeping batch order."""
+    batches = [scrape_df.iloc[start:start + batch_size] for start in range(0, len(scrape_df), batch_size)]
+    
+    def submit(batch_number, batch):
+        try:
+            job = upload_scrape_file(batch, compress)
+        except Exception as e:
+            job = {'job_id': None, 'status': 'error', 'message': str(e)}
+        job.update({'batch': batch_number, 'rows': len(batch)})
+        return job
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(submit, range(1, len(batches) + 1), batches))
+
+def merge_job_results(results):
+    """Merge the result frames of all sub-jobs into one frame."""
+    frames = [df for df in results if df is not None and not df.empty]
+    if not frames:
+        return apply_schema(pd.DataFrame(columns=list(CONTACT_SCHEMA)), CONTACT_SCHEMA)
+    return apply_schema(pd.concat(frames, ignore_index=True), CONTACT_SCHEMA)
+
+def wait_for_job_updates(job_ids):
+    """Rerun the page as soon as a polled job changes, checking once a second."""
+    versions = {job_id: (get_job_state(job_id) or {}).get("version") for job_id in job_ids}
+    placeholder = st.empty()
+    
+    # Each caption update lets a user interaction interrupt the wait
+    for elapsed in range(AUTO_REFRESH_MAX_SECONDS):
+        placeholder.caption(f"Watching job status... ({elapsed}s)")
+        time.sleep(1)
+        if any((get_job_state(job_id) or {}).get("version") != version for job_id, version in versions.items()):
+            break
+    
+    st.rerun()
+
 def scraping_options():
     """Provide options for contact data scraping."""
     st.header("Step 3: Scrape Additional Property Data")
@@ -74,22 +217,14 @@ def scraping_options():
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("✅ SAVE SCRAPED DATA & CONTINUE TO STEP 4", type="primary", use_container_width=True):
-                results_df = st.session_state.job_results
+                results_df = resolve_owners(with_row_ids(st.session_state.job_results))
                 
-                # Save to session state
+                # Save to session state; contacts stay in their own table, linked to properties by id
                 st.session_state.scraped_data = results_df
+                relation = get_relation(get_reviewed_data(), results_df)
+                linked = sum(1 for property_id in relation["contact_index"] if property_for(relation, property_id) is not None)
                 
-                # Combine scraped data with original data if it exists
-                if hasattr(st.session_state, 'data') and st.session_state.data is not None:
-                    # Ensure unique identification
-                    results_df['_source'] = 'scraped'
-                    st.session_state.data['_source'] = 'original'
-                    
-                    # Merge based on common columns
-                    merged_data = pd.concat([st.session_state.data, results_df], ignore_index=True)
-                    st.session_state.data = merged_data
-                
-                st.success("Scraped data saved and merged!")
+                st.success(f"Scraped data saved and linked to {linked} properties!")
                 st.session_state.step = 4  # Move to next step
                 st.rerun()
         
@@ -97,15 +232,21 @@ def scraping_options():
     
     # Now continue with the rest of the UI for data selection and job management
     if hasattr(st.session_state, 'data') and st.session_state.data is not None:
-        # Create a copy of the data for editing
-        data_for_scraping = st.session_state.data.copy()
+        # Column changes are kept as a plan; the editor works on a projected view of the reviewed data
+        column_plan = st.session_state.column_plan
+        data_for_scraping = apply_column_plan(get_reviewed_data(), column_plan)
         
         # Prepare data editor configuration
         column_config = {}
         
         # Define column configurations based on data types
         for col in data_for_scraping.columns:
-            if col in ['Account Number', 'Owner Name', 'Property Address', 'Owner Address', 'Billing Address', 'Cert Status', 'Deed Status', 'Millage Code']:
+            if isinstance(data_for_scraping[col].dtype, pd.CategoricalDtype):
+                column_config[col] = st.column_config.SelectboxColumn(
+                    col,
+                    options=list(data_for_scraping[col].cat.categories)
+                )
+            elif col in ['Account Number', 'Owner Name', 'Property Address', 'Owner Address', 'Billing Address', 'Cert Status', 'Deed Status', 'Millage Code']:
                 column_config[col] = st.column_config.TextColumn(col)
             elif col in ['Balance Amount', 'Assessed Value']:
                 column_config[col] = st.column_config.NumberColumn(
@@ -119,8 +260,17 @@ def scraping_options():
                     format="%d"
                 )
         
+        # Configure the columns added through the plan
+        for col, col_type in added_columns(column_plan).items():
+            if col_type == "Text":
+                column_config[col] = st.column_config.TextColumn(col)
+            elif col_type == "Number":
+                column_config[col] = st.column_config.NumberColumn(col)
+            elif col_type == "Checkbox":
+                column_config[col] = st.column_config.CheckboxColumn(col)
+        
         # Explicitly add selection column
-        data_for_scraping['_select'] = True
+        data_for_scraping = data_for_scraping.assign(_select=True)
         column_config['_select'] = st.column_config.CheckboxColumn(
             "Scrape", 
             default=True
@@ -137,17 +287,9 @@ def scraping_options():
             
             if st.button("Add Column"):
                 if new_col_name and new_col_name not in data_for_scraping.columns:
-                    # Add column based on selected type
-                    if col_type == "Text":
-                        data_for_scraping[new_col_name] = ""
-                        column_config[new_col_name] = st.column_config.TextColumn(new_col_name)
-                    elif col_type == "Number":
-                        data_for_scraping[new_col_name] = 0
-                        column_config[new_col_name] = st.column_config.NumberColumn(new_col_name)
-                    elif col_type == "Checkbox":
-                        data_for_scraping[new_col_name] = False
-                        column_config[new_col_name] = st.column_config.CheckboxColumn(new_col_name)
-                    st.success(f"Column '{new_col_name}' added successfully!")
+                    # Record the column in the plan, the editor picks it up on rerun
+                    st.session_state.column_plan = add_column(column_plan, new_col_name, col_type)
+                    st.rerun()
         
         with col_mgmt_tabs[1]:
             # Remove Column
@@ -156,10 +298,8 @@ def scraping_options():
             
             if st.button("Remove Selected Column"):
                 if col_to_remove and col_to_remove in data_for_scraping.columns:
-                    data_for_scraping = data_for_scraping.drop(columns=[col_to_remove])
-                    if col_to_remove in column_config:
-                        del column_config[col_to_remove]
-                    st.success(f"Column '{col_to_remove}' removed successfully!")
+                    st.session_state.column_plan = drop_column(column_plan, col_to_remove)
+                    st.rerun()
         
         with col_mgmt_tabs[2]:
             # Get current columns (excluding '_select')
@@ -175,10 +315,21 @@ def scraping_options():
             
             # Add a submit button to save the order
             if st.button("Save Column Order"):
-                # Store the column order in session state
+                # Store the column order in session state, it is applied at upload time
                 st.session_state.custom_column_order = reordered_columns
                 st.success("Column order saved!")
         
+        # Summary of the pending column changes
+        if column_plan or st.session_state.get('custom_column_order'):
+            added = list(added_columns(column_plan))
+            dropped = [col for col in get_reviewed_data().columns if col not in data_for_scraping.columns]
+            st.caption(f"Column plan: added {added or 'none'}, removed {dropped or 'none'}"
+                       f"{', custom order saved' if st.session_state.get('custom_column_order') else ''}")
+            if st.button("Reset Columns"):
+                st.session_state.column_plan = []
+                st.session_state.custom_column_order = None
+                st.rerun()
+        
         # Allow user to select rows for scraping
         st.subheader("Select and Edit Properties to Scrape")
         filtered_data = st.data_editor(
@@ -192,119 +343,176 @@ def scraping_options():
         selected_rows = filtered_data[filtered_data['_select'] == True]
         st.write(f"Selected {len(selected_rows)} out of {len(filtered_data)} properties")
         
+        # Batch settings, large selections are split into several jobs
+        cols = st.columns(3)
+        with cols[0]:
+            batch_size = st.number_input("Properties per job", min_value=1, value=DEFAULT_BATCH_SIZE, step=100)
+        with cols[1]:
+            max_workers = st.number_input("Parallel submissions", min_value=1, max_value=16, value=MAX_SUBMIT_WORKERS)
+        with cols[2]:
+            compress_upload = st.checkbox("Compress upload (gzip)", value=False,
+                                          help="Sends the CSV with gzip content encoding; the scraper API must accept it")
+        
+        # Properties scraped recently are answered from the local cache
+        cols = st.columns(3)
+        with cols[0]:
+            use_cache = st.checkbox("Reuse cached results", value=True,
+                                    help="Skip properties that were scraped recently and reuse their contacts")
+        with cols[1]:
+            cache_ttl_days = st.number_input("Cache freshness (days)", min_value=1, value=DEFAULT_TTL_DAYS, disabled=not use_cache)
+        
         # Scraping button
         if st.button("Start Scraping Selected Properties"):
             with st.spinner("Initiating data scraping..."):
-                # Prepare CSV from selected data
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv')
-                
-                # Get the custom column order or use default
-                current_columns = [col for col in data_for_scraping.columns if col != '_select']
-                column_order = st.session_state.get('custom_column_order', current_columns)
-                
-                # Remove the selection column and get only selected rows
-                scrape_df = selected_rows.copy()
-                scrape_df = scrape_df.drop(columns=['_select'])
-                
-                # Validate and enforce column order - FIX HERE
-                # Check if column_order is None or empty before iterating
-                final_columns = []
-                if column_order:  # Check if column_order exists and is not empty
-                    for col in column_order:
-                        if col in scrape_df.columns:
-                            final_columns.append(col)
-                
-                # If no custom order is found, use original columns
-                if not final_columns:
-                    final_columns = [col for col in current_columns if col in scrape_df.columns]
-                
-                # Reorder columns
-                scrape_df = scrape_df[final_columns]
-                
-                # Save to CSV
-                scrape_df.to_csv(temp_file.name, index=False)
-                temp_file.close()
+                # Remove the selection column, then apply the column plan and the custom order once
+                scrape_df = apply_column_plan(
+                    selected_rows.drop(columns=['_select']),
+                    column_plan,
+                    st.session_state.get('custom_column_order')
+                )
                 
                 # Debug information
                 st.write("Columns being scraped:", scrape_df.columns.tolist())
                 
+                # Only properties without fresh cached results are submitted
+                total_properties = len(scrape_df)
                 try:
-                    with open(temp_file.name, 'rb') as file:
-                        # Prepare files for upload
-                        files = {'file': file}
-                        
-                        # Make API request
-                        response = requests.post(UPLOAD_ENDPOINT, files=files)
-                        
-                        # Check response
-                        if response.status_code in [200, 202]:
-                            result = response.json()
-                            
-                            # Store job information in session state
-                            st.session_state.current_job = {
-                                'job_id': result.get('job_id'),
-                                'status': result.get('status'),
-                                'message': result.get('message')
-                            }
-                            
-                            # Display job information
-                            st.subheader("Job Information")
-                            st.json(st.session_state.current_job)
-                        else:
-                            st.error(f"API Error: {response.status_code}")
-                            st.error(response.text)
-                
+                    cached_contacts, scrape_df, scrape_fingerprints = split_cached(scrape_df, cache_ttl_days if use_cache else 0)
                 except Exception as e:
-                    st.error(f"Error during scraping: {str(e)}")
+                    st.warning(f"Scrape cache unavailable, submitting every property: {str(e)}")
+                    cached_contacts, scrape_fingerprints = None, None
+                st.session_state.cached_contacts = cached_contacts
+                st.session_state.scrape_fingerprints = scrape_fingerprints
+                if total_properties > len(scrape_df):
+                    st.write(f"{total_properties - len(scrape_df)} properties served from cache ({len(cached_contacts)} contacts)")
                 
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
+                if scrape_df.empty:
+                    # Everything was cached, no job is needed
+                    st.session_state.scrape_jobs = None
+                    st.session_state.current_job = None
+                    st.session_state.job_results = cached_contacts
+                    st.rerun()
+                
+                jobs = submit_scrape_batches(scrape_df, int(batch_size), int(max_workers), compress_upload)
+                submitted = [job for job in jobs if job.get('job_id')]
+                for job in jobs:
+                    if not job.get('job_id'):
+                        st.error(f"Error submitting batch {job['batch']}: {job['message']}")
+                
+                if submitted:
+                    # Store job information in session state
+                    st.session_state.job_results = None
+                    st.session_state.scrape_jobs = submitted
+                    st.session_state.current_job = submitted[0]
+                    
+                    # Display job information
+                    st.subheader("Job Information")
+                    st.write(f"Submitted {len(submitted)} of {len(jobs)} job(s) for {len(scrape_df)} properties")
+                    if compress_upload:
+                        sent = sum(job['upload_bytes'] for job in submitted)
+                        raw = sum(job['csv_bytes'] for job in submitted)
+                        st.write(f"Uploaded {sent / 1024:.0f} KB instead of {raw / 1024:.0f} KB")
+                    st.json(submitted if len(submitted) > 1 else submitted[0])
     else:
         st.warning("No property data available from previous steps.")
     
     # Job management section
     st.subheader("Job Management")
     
-    # Check Job Status Button - add a check for current_job
-    if hasattr(st.session_state, 'current_job') and st.session_state.current_job is not None:
-        job_id = st.session_state.current_job.get('job_id')
-        
-        if job_id:
-            # Show current job status
-            st.info(f"Current Job ID: {job_id}")
-            st.info(f"Status: {st.session_state.current_job.get('status', 'Unknown')}")
-            
-            col1, col2 = st.columns(2)
+    # Jobs still being polled in the background
+    running_jobs = []
+    
+    # Job status comes from the background poller, no request is made on rerun
+    jobs = st.session_state.get('scrape_jobs') or []
+    if not jobs and st.session_state.get('current_job') is not None and st.session_state.current_job.get('job_id'):
+        jobs = [st.session_state.current_job]
+    
+    if jobs:
+        job_states = {}
+        for job in jobs:
+            # Loaded jobs are no longer polled, their last state is kept on the job
+            if job.get('results_loaded'):
+                job_states[job['job_id']] = job['poll_state']
+                continue
             
-            with col1:
-                if st.button("Check Job Status"):
-                    # Fetch and display job status
-                    status = check_job_status(job_id)
-                    if status:
-                        # Update the stored job information
-                        st.session_state.current_job.update(status)
-                        
-                        # Display updated job information
-                        st.subheader("Updated Job Status")
-                        st.json(st.session_state.current_job)
+            start_polling(job['job_id'], fetch_job_status, fetch_job_results)
+            job_states[job['job_id']] = get_job_state(job['job_id'])
             
-            # Get Job Results Button (only if status is completed)
-            with col2:
-                if st.session_state.current_job.get('status') == 'completed':
-                    if st.button("Get Job Results"):
-                        # Fetch and display job results
-                        results = get_job_results(job_id)
-                        if results:
-                            results_df = pd.DataFrame(results)
-                            
-                            # Save results to session state
-                            st.session_state.job_results = results_df
-                            
-                            # Force a rerun to show the results and continue button at the top
-                            st.rerun()
+            # Update the stored job information
+            if job_states[job['job_id']].get("info"):
+                job.update(job_states[job['job_id']]["info"])
+        
+        if len(jobs) == 1:
+            # Show current job status
+            job_state = job_states[jobs[0]['job_id']]
+            st.info(f"Current Job ID: {jobs[0]['job_id']}")
+            st.info(f"Status: {jobs[0].get('status', 'Unknown')}")
+            st.caption(f"Status checks: {job_state.get('checks', 0)}, last update {time.strftime('%H:%M:%S', time.localtime(job_state['updated_at']))}")
+            if job_state.get("error"):
+                st.warning(f"Last polling error: {job_state['error']}")
+        else:
+            # Show one row per sub-job
+            finished = sum(1 for job in jobs if job_states[job['job_id']].get("done"))
+            st.progress(finished / len(jobs), text=f"{finished} of {len(jobs)} jobs finished")
+            st.dataframe(pd.DataFrame([{
+                "batch": job.get('batch'),
+                "job_id": job['job_id'],
+                "rows": job.get('rows'),
+                "status": job.get('status', 'Unknown'),
+                "checks": job_states[job['job_id']].get('checks', 0),
+                "error": job_states[job['job_id']].get('error') or ""
+            } for job in jobs]), use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("Check Job Status"):
+                # Ask the pollers for an immediate check
+                for job in jobs:
+                    poll_now(job['job_id'])
+                st.json(jobs if len(jobs) > 1 else jobs[0])
+        
+        # Get Job Results Button, a fallback when the automatic download failed
+        missing = [job for job in jobs if job.get('status') == 'completed' and not job.get('results_loaded') and job_states[job['job_id']].get("results") is None]
+        with col2:
+            if missing and st.button("Get Job Results"):
+                for job in missing:
+                    results_df = get_job_results(job['job_id'])
+                    if results_df is not None:
+                        update_job(job['job_id'], results=results_df, done=True)
+                st.rerun()
+        
+        # Results are merged and loaded once every job has finished
+        if all(job_states[job['job_id']].get("done") for job in jobs) and not all(job.get('results_loaded') for job in jobs):
+            results = [job_states[job['job_id']].get("results") for job in jobs]
+            cached_contacts = st.session_state.get('cached_contacts')
+            # Failed jobs stay visible in the job table, the others are merged;
+            # cache hits are shown even when every job failed
+            if any(result is not None for result in results) or (cached_contacts is not None and not cached_contacts.empty):
+                new_results = None
+                if any(result is not None for result in results):
+                    new_results = merge_job_results(results)
+                    
+                    # Cache the fresh results; with failed jobs only properties that returned contacts are cached
+                    fingerprints = st.session_state.get('scrape_fingerprints')
+                    if fingerprints is not None and any(result is None for result in results):
+                        fingerprints = fingerprints[fingerprints.index.isin(new_results["id"].astype(str))]
+                    try:
+                        store_results(new_results, fingerprints)
+                    except Exception as e:
+                        st.warning(f"Could not update the scrape cache: {str(e)}")
+                
+                st.session_state.job_results = merge_job_results([cached_contacts, new_results])
+                # Release the result frames held by the poller now that they are merged
+                for job in jobs:
+                    job['results_loaded'] = True
+                    job['poll_state'] = {key: value for key, value in job_states[job['job_id']].items() if key != "results"}
+                    forget_job(job['job_id'])
+                
+                # Force a rerun to show the results and continue button at the top
+                st.rerun()
+        
+        running_jobs = [job['job_id'] for job in jobs if not job_states[job['job_id']].get("done")]
     
     # Manual override option
     with st.expander("Manual Override Options"):
@@ -331,6 +539,10 @@ def scraping_options():
                 st.session_state.step = 4
                 st.rerun()
     
+    # Refresh the page by itself while jobs are running
+    if running_jobs and st.checkbox("Auto-refresh job status", value=True, key="auto_refresh_jobs"):
+        wait_for_job_updates(running_jobs)
+    
     return False
 
 def show():
@@ -3,12 +3,21 @@ import pandas as pd
 from utils import navigation_buttons
 import step1_upload
 import step3_scrape
+from step2_review import get_reviewed_data
+from relations import get_relation, contacts_for_owner, property_for
+from owner_resolution import OWNER_ID, resolve_owners
+from owner_browser import browse_owners
+from preview import show_preview
+from schema import CONTACT_SCHEMA, apply_schema
+from contact_normalize import normalize_contacts
+from session_store import view
+from contact_selection import ROW_ID, with_row_ids, get_selection, editor_input, changed_selection, apply_selection_edits, selected_contacts
 
 def parse_uploaded_contacts(file):
     """Parse an uploaded contacts CSV file."""
     try:
-        # Read the CSV file
-        df = pd.read_csv(file)
+        # Read the CSV file; values stay text so phone numbers are not parsed as floats
+        df = pd.read_csv(file, dtype={"value": str})
         
         # Check for required columns
         required_columns = ['id', 'name', 'type', 'value']
@@ -29,6 +38,13 @@ def parse_uploaded_contacts(file):
             df.loc[~df['type'].isin(valid_types), 'type'] = 'phone_number'
             st.info("Invalid types have been converted to 'phone_number'.")
         
+        # Normalize phones and emails, then drop invalid and duplicate contacts
+        df, report = normalize_contacts(df)
+        if report["invalid_phones"] or report["invalid_emails"]:
+            st.warning(f"Dropped {report['invalid_phones']} invalid phone numbers and {report['invalid_emails']} invalid email addresses.")
+        if report["duplicates"]:
+            st.info(f"Dropped {report['duplicates']} duplicate contacts.")
+        
         # Add required columns if they don't exist
         if 'selected' not in df.columns:
             df['selected'] = True
@@ -39,7 +55,7 @@ def parse_uploaded_contacts(file):
         if 'current_address' not in df.columns:
             df['current_address'] = df['address']
         
-        return df
+        return resolve_owners(with_row_ids(apply_schema(df, CONTACT_SCHEMA)))
         
     except Exception as e:
         st.error(f"Error parsing contacts file: {str(e)}")
@@ -89,99 +105,108 @@ def show():
         
         # Display original property data
         with st.expander("Property Data"):
-            if hasattr(st.session_state, 'selected_data') and st.session_state.selected_data is not None:
-                original_data = st.session_state.selected_data
-            else:
-                original_data = st.session_state.data
-                
+            original_data = get_reviewed_data()
             st.dataframe(original_data, use_container_width=True)
         
-        # Group contact data by owner and type for better organization
-        contact_data = st.session_state.scraped_data.copy()
+        # Give every contact a stable row id so selections can be applied by position,
+        # and a canonical owner id so name variants of one person are grouped together
+        st.session_state.scraped_data = resolve_owners(with_row_ids(st.session_state.scraped_data))
         
-        # Add a selection column if it doesn't exist
-        if "selected" not in contact_data.columns:
-            contact_data["selected"] = True
+        # Selection state lives in a boolean array indexed by row id
+        selection = get_selection(st.session_state.scraped_data)
+        contact_data = view(st.session_state.scraped_data)
         
         # Group contacts by owner and display in expandable sections
         st.subheader("Available Contact Information")
         
-        # Get unique property IDs and owners
-        unique_properties = contact_data[["id", "name", "address"]].drop_duplicates()
+        # Hash indexes from contacts to owners and property rows
+        relation = get_relation(original_data, st.session_state.scraped_data)
+        
+        # Only the owners on the current page are rendered
+        page_owners = browse_owners(relation, "select_owners")
+        
+        # (row ids, selected flags) changed in every editor, applied together below
+        selection_edits = []
         
-        # Create a container for each property owner
-        for _, prop in unique_properties.iterrows():
-            property_id = prop["id"]
-            owner_name = prop["name"]
-            property_address = prop["address"]
+        # Create a container for each owner
+        for _, owner in page_owners.iterrows():
+            owner_name = owner["name"]
+            property_address = owner["address"]
+            property_ids = owner["properties"]
             
-            # Create an expander for each property/owner
-            with st.expander(f"{owner_name} - {property_address} (ID: {property_id})"):
-                # Filter contacts for this owner
-                owner_contacts = contact_data[(contact_data["id"] == property_id) & 
-                                            (contact_data["name"] == owner_name)]
+            # Create an expander for each owner
+            with st.expander(f"{owner_name} - {property_address} (ID: {property_ids})"):
+                # Look up this owner's contacts and the properties they were found on
+                owner_contacts = contacts_for_owner(relation, owner["owner"], contacts=contact_data).set_index(ROW_ID)
+                for property_id in owner_contacts["id"].unique():
+                    linked_property = property_for(relation, property_id)
+                    if linked_property is not None:
+                        st.caption(f"{property_id}: " + " | ".join(
+                            f"{col}: {linked_property[col]}" for col in ["Account Status", "Balance Amount", "Cert Status"]
+                            if col in linked_property.index
+                        ))
                 
                 # Create tabs for phone numbers and emails
                 phone_tab, email_tab = st.tabs(["Phone Numbers", "Email Addresses"])
                 
                 with phone_tab:
+                    phone_key = f"select_phone_{owner['owner']}"
                     phone_contacts = owner_contacts[owner_contacts["type"] == "phone_number"]
                     if not phone_contacts.empty:
                         # Create a dataframe editor for phone numbers
+                        phone_contacts = editor_input(phone_contacts, selection, phone_key)
                         phone_editor = st.data_editor(
                             phone_contacts,
                             column_config={
                                 "selected": st.column_config.CheckboxColumn("Select", default=True),
                                 "value": st.column_config.TextColumn("Phone Number", help="Owner's phone number"),
                                 "name": st.column_config.TextColumn("Name", disabled=True),
-                                "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property")
+                                "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property"),
+                                OWNER_ID: None
                             },
                             hide_index=True,
                             use_container_width=True,
-                            disabled=["id", "address", "name", "type"]
+                            disabled=["id", "address", "name", "type"],
+                            key=phone_key
                         )
                         
-                        # Update the selection status in the main dataframe
-                        for i, row in phone_editor.iterrows():
-                            idx = contact_data[(contact_data["id"] == row["id"]) & 
-                                            (contact_data["name"] == row["name"]) & 
-                                            (contact_data["type"] == "phone_number") & 
-                                            (contact_data["value"] == row["value"])].index
-                            if len(idx) > 0:
-                                contact_data.loc[idx, "selected"] = row["selected"]
+                        # The editor keeps the row ids as its index
+                        selection_edits.append(changed_selection(phone_contacts, phone_editor))
                     else:
                         st.info("No phone numbers found for this owner.")
                 
                 with email_tab:
+                    email_key = f"select_email_{owner['owner']}"
                     email_contacts = owner_contacts[owner_contacts["type"] == "email"]
                     if not email_contacts.empty:
                         # Create a dataframe editor for emails
+                        email_contacts = editor_input(email_contacts, selection, email_key)
                         email_editor = st.data_editor(
                             email_contacts,
                             column_config={
                                 "selected": st.column_config.CheckboxColumn("Select", default=True),
                                 "value": st.column_config.TextColumn("Email Address", help="Owner's email address"),
                                 "name": st.column_config.TextColumn("Name", disabled=True),
-                                "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property")
+                                "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property"),
+                                OWNER_ID: None
                             },
                             hide_index=True,
                             use_container_width=True,
-                            disabled=["id", "address", "name", "type"]
+                            disabled=["id", "address", "name", "type"],
+                            key=email_key
                         )
                         
-                        # Update the selection status in the main dataframe
-                        for i, row in email_editor.iterrows():
-                            idx = contact_data[(contact_data["id"] == row["id"]) & 
-                                            (contact_data["name"] == row["name"]) & 
-                                            (contact_data["type"] == "email") & 
-                                            (contact_data["value"] == row["value"])].index
-                            if len(idx) > 0:
-                                contact_data.loc[idx, "selected"] = row["selected"]
+                        # The editor keeps the row ids as its index
+                        selection_edits.append(changed_selection(email_contacts, email_editor))
                     else:
                         st.info("No email addresses found for this owner.")
         
+        # Apply every editor's selection in one vectorized update
+        selection = apply_selection_edits(selection, selection_edits)
+        contact_data = selected_contacts(contact_data, selection)
+        
         # Save the updated contact data
-        st.session_state.final_data = contact_data[contact_data["selected"] == True]
+        st.session_state.final_data = contact_data[contact_data["selected"].to_numpy()]
         
         # Manual contact entry option
         with st.expander("Add Contact Information Manually"):
@@ -219,7 +244,7 @@ def show():
                     })
                     
                     # Append to existing data
-                    updated_data = pd.concat([contact_data, new_record], ignore_index=True)
+                    updated_data = resolve_owners(with_row_ids(apply_schema(pd.concat([contact_data, new_record], ignore_index=True), CONTACT_SCHEMA)))
                     st.session_state.scraped_data = updated_data
                     st.success("Contact record added successfully!")
                     st.experimental_rerun()
@@ -244,6 +269,9 @@ def show():
         - **current_address**: Current mailing address if different
         - **selected**: True/False to pre-select contacts
         
+        Phone numbers are converted to E.164 (e.g. +15551234567) and emails to lowercase.
+        Invalid values and duplicate contacts for the same owner are dropped.
+        
         Example CSV structure:
         ```
         id,name,type,value,address,current_address
@@ -260,13 +288,8 @@ def show():
             # Display preview button
             if st.button("Preview CSV"):
                 try:
-                    # Read the file for preview
-                    preview_df = pd.read_csv(uploaded_file)
-                    st.write("Preview of first 5 rows:")
-                    st.dataframe(preview_df.head(5), use_container_width=True)
-                    
-                    # Reset the file pointer for later processing
-                    uploaded_file.seek(0)
+                    # Read only the head of the file for the preview
+                    show_preview(uploaded_file)
                 except Exception as e:
                     st.error(f"Error previewing file: {str(e)}")
             
@@ -326,11 +349,10 @@ def show():
     # Show preview of selected contact information (shown for both tabs)
     st.subheader("Selected Contact Information Preview")
     if hasattr(st.session_state, 'final_data') and not st.session_state.final_data.empty:
-        selected_data = st.session_state.final_data.copy()
+        selected_data = st.session_state.final_data
         
-        # Remove the selected column for display
-        if "selected" in selected_data.columns:
-            selected_data = selected_data.drop("selected", axis=1)
+        # Remove the selection bookkeeping columns for display
+        selected_data = selected_data.drop(columns=["selected", ROW_ID, OWNER_ID], errors="ignore")
             
         st.dataframe(selected_data, use_container_width=True)
         
@@ -3,7 +3,34 @@ import pandas as pd
 import time
 import json
 import requests
+import numpy as np
+from contextlib import closing
 from utils import call_api, navigation_buttons
+from session_store import view
+from relations import get_relation, contacts_for_owner, owner_keys
+from owner_resolution import OWNER_ID, resolve_owners
+from contact_selection import ROW_ID, with_row_ids, apply_row_edits
+from owner_browser import browse_owners
+from outbox import PENDING, SENT, FAILED, start_campaign, unfinished_campaign, campaign_counts, campaign_report, enqueue, mark, pending, connect as connect_outbox
+from send_ledger import DEFAULT_WINDOW_DAYS, recently_contacted, record_sends, connect as connect_ledger
+from payloads import DEFAULT_BULK_SIZE, build_payload, coalesce_payloads, batch_payloads
+from dispatcher import CHANNEL_LIMITS, DEFAULT_RATE_PER_SECOND, MAX_RETRIES, RetryableError, dispatch
+
+# Marketing API endpoint and the time allowed for each call
+API_ENDPOINT = "http://llmmsi.a.pinggy.link/marketing/start"
+REQUEST_TIMEOUT = 30
+
+# Columns of the notification status report
+STATUS_COLUMNS = ["id", "name", "contact", "type", "timestamp", "status", "response"]
+
+# Seconds between refreshes of the live progress while sending
+PROGRESS_REFRESH_SECONDS = 0.5
+
+# Seconds between writes of the contacts reached so far to the send ledger
+LEDGER_FLUSH_SECONDS = 0.5
+
+# Contacts kept per owner by "Select First Contacts Only", by contact type
+DEFAULT_CONTACT_QUOTAS = {"phone_number": 1, "email": 1}
 
 def get_sample_data():
     """Return sample property data."""
@@ -49,68 +76,46 @@ def get_sample_scraped_data():
     
     return sample_data
 
-def select_first_contacts():
+def select_first_contacts(quotas=None):
     """
-    Direct implementation to select one phone and one email per unique owner name.
+    Keep the first contacts of each type for every owner, up to a quota per type.
+
+    Contacts keep their order, so the first ones of a type are the ones selected.
     """
+    quotas = DEFAULT_CONTACT_QUOTAS if quotas is None else quotas
     try:
-        st.write("Running direct implementation of select_first_contacts")
-        
         # Get current data from session state
         if not hasattr(st.session_state, 'final_data') or st.session_state.final_data is None:
             st.error("No data in session state")
             return None
             
-        # Create a copy of the data to work with
-        all_contacts_df = st.session_state.final_data.copy()
-        st.write(f"Starting with {len(all_contacts_df)} contacts, {len(all_contacts_df['name'].unique())} unique names")
+        # Create a copy-on-write view of the data to work with
+        all_contacts_df = view(st.session_state.final_data)
         
-        # Convert to records for easier processing
-        all_contacts = all_contacts_df.to_dict('records')
-        st.write(f"Converted {len(all_contacts)} rows to dictionary records")
+        # Rank contacts within each owner and type in their current order
+        group_keys = owner_keys(all_contacts_df)
+        group_keys = (group_keys if isinstance(group_keys, list) else [group_keys]) + ["type"]
+        rank = all_contacts_df.groupby(group_keys, sort=False, observed=True, dropna=False).cumcount().to_numpy()
+        quota = all_contacts_df["type"].astype(str).map(quotas).fillna(0).to_numpy()
         
-        # Get unique names
-        unique_names = list(set([contact['name'] for contact in all_contacts]))
-        st.write(f"Found {len(unique_names)} unique names: {unique_names}")
+        result_df = all_contacts_df[rank < quota]
+        if result_df.empty:
+            st.error("No contacts were selected")
+            return None
         
-        # Store selected contacts
-        selected_contacts = []
+        # Add send_to column
+        result_df = result_df.assign(send_to=True)
         
-        # Process each unique name
-        for name in unique_names:
-            st.write(f"Processing {name}")
-            
-            # Get all contacts for this name
-            name_contacts = [c for c in all_contacts if c['name'] == name]
-            
-            # Find first phone number
-            phone_contacts = [c for c in name_contacts if c['type'] == 'phone_number']
-            if phone_contacts:
-                selected_contacts.append(phone_contacts[0])
-                st.write(f"Added phone for {name}: {phone_contacts[0]['value']}")
-            
-            # Find first email
-            email_contacts = [c for c in name_contacts if c['type'] == 'email']
-            if email_contacts:
-                selected_contacts.append(email_contacts[0])
-                st.write(f"Added email for {name}: {email_contacts[0]['value']}")
+        # Save to session state
+        st.session_state.final_data = result_df
         
-        # Convert back to DataFrame
-        if selected_contacts:
-            result_df = pd.DataFrame(selected_contacts)
-            
-            # Add send_to column
-            result_df['send_to'] = True
-            
-            # Save to session state
-            st.session_state.final_data = result_df
-            
-            # Show success
-            st.write(f"Successfully selected {len(result_df)} contacts from {len(result_df['name'].unique())} unique owners")
-            return result_df
-        else:
-            st.error("No contacts were selected")
-            return None
+        # Summarize instead of listing every contact
+        counts = result_df["type"].astype(str).value_counts()
+        st.write(
+            f"Selected {len(result_df)} of {len(all_contacts_df)} contacts for {result_df[group_keys[:-1]].drop_duplicates().shape[0]} owners "
+            f"({counts.get('phone_number', 0)} phone numbers, {counts.get('email', 0)} emails)"
+        )
+        return result_df
             
     except Exception as e:
         import traceback
@@ -118,47 +123,139 @@ def select_first_contacts():
         st.error(traceback.format_exc())
         return None
 
-def send_marketing_notification(contact_dict):
-    """Send notification via the marketing API."""
-    try:
-        # API endpoint
-        API_ENDPOINT = "http://llmmsi.a.pinggy.link/marketing/start"
-        
-        # Extract contact information
-        name = contact_dict["name"]
-        address = contact_dict["address"]
-        
-        # Create payload - always include all fields with empty strings instead of None
-        payload = {
-            "name": name,
-            "address": address,
-            "phone_number": "",  # Default to empty string instead of None
-            "email": ""          # Default to empty string instead of None
-        }
-        
-        # Update with actual values if available
-        if contact_dict["type"] == "phone_number":
-            payload["phone_number"] = contact_dict["value"]
-        elif contact_dict["type"] == "email":
-            payload["email"] = contact_dict["value"]
-        
-        # Debug
-        st.write(f"Sending payload: {payload}")
-        
-        # Send request
-        response = requests.post(API_ENDPOINT, headers={'Content-Type': 'application/json'}, data=json.dumps(payload))
+def post_payload(payload):
+    """Post one payload, or a list of payloads in bulk mode, without touching the UI."""
+    response = requests.post(
+        API_ENDPOINT,
+        headers={'Content-Type': 'application/json'},
+        data=json.dumps(payload),
+        timeout=REQUEST_TIMEOUT
+    )
+    
+    # Server errors are retried by the dispatcher
+    if response.status_code >= 500:
+        raise RetryableError(f"API Error: {response.status_code}")
+    if response.status_code == 200:
+        return response.json(), True
+    return response.text, False
+
+def payload_channel(payload):
+    """Return the dispatch channel of a payload or batch: SMS/calls when any phone is present."""
+    payloads = payload if isinstance(payload, list) else [payload]
+    return "sms" if any(p["phone_number"] for p in payloads) else "email"
+
+def status_report(campaign):
+    """Build the notification status table of a campaign from the outbox."""
+    report = campaign_report(campaign)
+    if report.empty:
+        return pd.DataFrame(columns=STATUS_COLUMNS)
+    
+    sent = (report["outbox_status"] == SENT).to_numpy()
+    return pd.DataFrame({
+        "id": report["id"],
+        "name": report["name"],
+        "contact": report["value"],
+        "type": report["type"].map({"phone_number": "Call/SMS"}).fillna("Email"),
+        "timestamp": report["outbox_updated_at"],
+        "status": report["outbox_status"].map({SENT: "Sent", FAILED: "Failed", PENDING: "Pending"}),
+        "response": report["outbox_response"].where(sent, "Error")
+    })
+
+def new_status_buffer(contacts):
+    """Preallocate one status slot per contact, filled in as results arrive."""
+    buffer = {col: np.full(len(contacts), None, dtype=object) for col in STATUS_COLUMNS}
+    buffer["id"][:] = [contact["id"] for contact in contacts]
+    buffer["name"][:] = [contact["name"] for contact in contacts]
+    buffer["contact"][:] = [contact["value"] for contact in contacts]
+    buffer["type"][:] = ["Call/SMS" if contact["type"] == "phone_number" else "Email" for contact in contacts]
+    buffer["status"][:] = "Pending"
+    return buffer
+
+def send_campaign(campaign, retry_failed=False, coalesce=True, bulk_size=0, **dispatch_options):
+    """
+    Send the contacts of a campaign that are still pending in the outbox.
+
+    With coalesce, an owner's phone numbers and emails share payloads; with a
+    bulk_size, payloads are posted as JSON arrays of up to that many.
+
+    Each result is written to the outbox as soon as it arrives, so an interrupted
+    send can be resumed, and every contact reached is added to the send ledger.
+    Returns the status report of the whole campaign.
+    """
+    items = pending(campaign, retry_failed=retry_failed)
+    contacts = [contact for _, contact in items]
+    
+    # One payload per contact, or each owner's contacts merged into the fewest payloads
+    if coalesce:
+        payloads = coalesce_payloads(pd.DataFrame(contacts))
+    else:
+        payloads = [(build_payload(contact), [position]) for position, contact in enumerate(contacts)]
+    if bulk_size:
+        payloads = batch_payloads(payloads, bulk_size)
+    
+    # Live progress, counters and the rows finished so far
+    buffer = new_status_buffer(contacts)
+    done = np.zeros(len(contacts), dtype=bool)
+    totals = {"sent": 0, "failed": 0, "rendered_at": 0.0}
+    started = time.time()
+    progress_bar = st.progress(0.0, text=f"Sending {len(contacts)} notifications...")
+    live_table = st.empty()
+    
+    def render(force=False):
+        now = time.time()
+        if not contacts or (not force and now - totals["rendered_at"] < PROGRESS_REFRESH_SECONDS):
+            return
+        totals["rendered_at"] = now
+        finished = totals["sent"] + totals["failed"]
+        rate = finished / max(now - started, 1e-6)
+        progress_bar.progress(
+            finished / len(contacts),
+            text=f"{finished}/{len(contacts)} done · {totals['sent']} sent · {totals['failed']} failed · {rate:.1f}/s"
+        )
+        live_table.dataframe(pd.DataFrame(buffer)[done], use_container_width=True)
+    
+    # Contacts reached but not yet written to the send ledger
+    unrecorded = []
+    totals["recorded_at"] = started
+    
+    with closing(connect_outbox()) as conn, closing(connect_ledger()) as ledger:
+        def flush_ledger():
+            # Remember who was messaged so later campaigns can skip them
+            if unrecorded:
+                record_sends(pd.DataFrame(unrecorded, columns=["type", "value"]), conn=ledger)
+                unrecorded.clear()
+            totals["recorded_at"] = time.time()
         
-        # Check response
-        if response.status_code == 200:
-            return response.json(), True
-        else:
-            st.error(f"API Error: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return response.text, False
+        def record(index, result):
+            response, success = result
+            positions = payloads[index][1]
+            for position in positions:
+                mark(conn, items[position][0], success, response)
             
-    except Exception as e:
-        st.error(f"Error sending notification: {str(e)}")
-        return str(e), False
+            # The ledger is written in small batches, so a crash loses at most the last moments of sends
+            if success:
+                unrecorded.extend(contacts[position] for position in positions)
+                if time.time() - totals["recorded_at"] >= LEDGER_FLUSH_SECONDS:
+                    flush_ledger()
+            
+            # Fill the preallocated slots of these contacts
+            buffer["timestamp"][positions] = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+            buffer["status"][positions] = "Sent" if success else "Failed"
+            buffer["response"][positions] = str(response) if success else "Error"
+            done[positions] = True
+            totals["sent" if success else "failed"] += len(positions)
+            render()
+        
+        try:
+            dispatch([payload for payload, _ in payloads], post_payload, payload_channel, on_result=record, **dispatch_options)
+        finally:
+            flush_ledger()
+            render(force=True)
+    
+    # The report covers the whole campaign and is built once, from the outbox
+    progress_bar.empty()
+    live_table.empty()
+    return status_report(campaign)
 
 def show():
     """Display the notification step."""
@@ -187,11 +284,17 @@ def show():
     
     # First Contacts Only button
     col1, col2 = st.columns([3, 1])
+    with col1:
+        quota_cols = st.columns(2)
+        with quota_cols[0]:
+            phone_quota = st.number_input("Phones per owner", min_value=0, max_value=20, value=DEFAULT_CONTACT_QUOTAS["phone_number"], step=1)
+        with quota_cols[1]:
+            email_quota = st.number_input("Emails per owner", min_value=0, max_value=20, value=DEFAULT_CONTACT_QUOTAS["email"], step=1)
     with col2:
-        if st.button("📞 Select First Contacts Only", help="For each property, select only the first phone number and first email"):
-            selected = select_first_contacts()
+        if st.button("📞 Select First Contacts Only", help="For each owner, keep only the first phone numbers and emails up to the quotas"):
+            selected = select_first_contacts({"phone_number": phone_quota, "email": email_quota})
             if selected is not None:
-                st.success(f"Selected {len(selected)} contacts (first phone and email for each property)")
+                st.success(f"Selected {len(selected)} contacts (first {phone_quota} phone and {email_quota} email for each owner)")
                 st.experimental_rerun()
     
     # Test your contacts button
@@ -208,8 +311,12 @@ def show():
                     type_count = len(name_data[name_data['type'] == type_val])
                     st.write(f"    - {type_val}: {type_count}")
     
+    # Give every contact a row id so edits on one page can be written back,
+    # and a canonical owner id to group recipients on
+    st.session_state.final_data = resolve_owners(with_row_ids(st.session_state.final_data))
+    
     # Group contacts by owner for better organization
-    contact_data = st.session_state.final_data.copy()
+    contact_data = view(st.session_state.final_data)
     
     # Add send_to column if it doesn't exist
     if "send_to" not in contact_data.columns:
@@ -218,28 +325,25 @@ def show():
     # Display contacts grouped by owner
     st.subheader("Recipients")
     
-    # Get unique owners
-    unique_owners = contact_data[["id", "name", "address"]].drop_duplicates()
-    owners_data = {}
+    # Hash index from owners to their contacts
+    relation = get_relation(None, st.session_state.final_data, key="notify_relation")
     
-    # Counter for unique widget keys
-    widget_counter = 0
+    # Only the owners on the current page are rendered
+    page_owners = browse_owners(relation, "notify_owners")
+    edited_pages = []
     
-    for _, owner in unique_owners.iterrows():
-        widget_counter += 1
-        owner_id = owner["id"]
+    for _, owner in page_owners.iterrows():
         owner_name = owner["name"]
         owner_address = owner["address"]
+        owner_ids = owner["properties"]
         
         # Using a unique expander key for each owner
-        with st.expander(f"{owner_name} - {owner_address} (ID: {owner_id})", expanded=True):
-            # Filter contacts for this owner
-            owner_contacts = contact_data[(contact_data["id"] == owner_id) & 
-                                        (contact_data["name"] == owner_name)]
+        with st.expander(f"{owner_name} - {owner_address} (ID: {owner_ids})", expanded=True):
+            # Look up this owner's contacts, keyed by row id
+            owner_contacts = contacts_for_owner(relation, owner["owner"], contacts=contact_data).set_index(ROW_ID)
             
-            # Create a dataframe editor for this owner's contacts with a UNIQUE key
-            # The key issue is here - we need to ensure each data_editor has a unique key
-            unique_editor_key = f"editor_{owner_id}_{widget_counter}_{owner_name}"
+            # Each owner keeps the same editor key on every page
+            unique_editor_key = f"editor_{owner['owner']}"
             
             edited_contacts = st.data_editor(
                 owner_contacts,
@@ -252,7 +356,8 @@ def show():
                         disabled=True
                     ),
                     "value": st.column_config.TextColumn("Contact Value", help="Phone number or email address"),
-                    "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property")
+                    "current_address": st.column_config.TextColumn("Current Address", help="Current address if different from property"),
+                    OWNER_ID: None
                 },
                 hide_index=True,
                 use_container_width=True,
@@ -260,16 +365,15 @@ def show():
                 key=unique_editor_key  # Using the unique key here
             )
             
-            # Store the edited data for this owner
-            owners_data[f"{owner_id}_{owner_name}"] = edited_contacts
+            # Keep the page so its edits can be written back
+            edited_pages.append((owner_contacts, edited_contacts))
     
-    # Combine all the edited data
-    updated_contacts = pd.DataFrame()
-    for key, edited_data in owners_data.items():
-        updated_contacts = pd.concat([updated_contacts, edited_data], ignore_index=True)
+    # Write the edits of the visible owners back into the full table
+    updated_contacts = apply_row_edits(contact_data, edited_pages)
     
-    # Update the session state with the edited data
-    st.session_state.final_data = updated_contacts
+    # Update the session state only when something changed
+    if updated_contacts is not contact_data or "send_to" not in st.session_state.final_data.columns:
+        st.session_state.final_data = updated_contacts
     
     # Only include rows where send_to is True
     selected_contacts = updated_contacts[updated_contacts["send_to"] == True]
@@ -289,6 +393,59 @@ def show():
         st.write(f"• Phone numbers: {phone_count}")
         st.write(f"• Email addresses: {email_count}")
         
+        # Concurrency and retry settings for the send
+        with st.expander("Sending Options"):
+            option_cols = st.columns(4)
+            with option_cols[0]:
+                sms_limit = st.number_input("Concurrent SMS/calls", min_value=1, max_value=32, value=CHANNEL_LIMITS["sms"], step=1)
+            with option_cols[1]:
+                email_limit = st.number_input("Concurrent emails", min_value=1, max_value=32, value=CHANNEL_LIMITS["email"], step=1)
+            with option_cols[2]:
+                rate_limit = st.number_input("Max requests per second", min_value=0.1, max_value=100.0, value=DEFAULT_RATE_PER_SECOND, step=1.0)
+            with option_cols[3]:
+                max_retries = st.number_input("Retries on errors", min_value=0, max_value=10, value=MAX_RETRIES, step=1)
+            
+            payload_cols = st.columns(3)
+            with payload_cols[0]:
+                coalesce = st.checkbox("Combine each owner's phone and email", value=True, help="Sends one request carrying both instead of one per contact")
+            with payload_cols[1]:
+                bulk_mode = st.checkbox("Bulk mode", value=False, help="Posts a JSON array of payloads per request; the endpoint must accept arrays")
+            with payload_cols[2]:
+                bulk_size = st.number_input("Payloads per bulk request", min_value=2, max_value=1000, value=DEFAULT_BULK_SIZE, step=1, disabled=not bulk_mode)
+            
+            ledger_cols = st.columns(2)
+            with ledger_cols[0]:
+                skip_recent = st.checkbox("Skip contacts messaged recently", value=True, help="Checked against every earlier campaign")
+            with ledger_cols[1]:
+                window_days = st.number_input("Recent means within (days)", min_value=1, max_value=365, value=DEFAULT_WINDOW_DAYS, step=1, disabled=not skip_recent)
+        
+        # Contacts messaged by an earlier campaign within the window are left out
+        to_send = selected_contacts
+        if skip_recent:
+            try:
+                recent = recently_contacted(selected_contacts, window_days)
+                if recent.any():
+                    to_send = selected_contacts[~recent]
+                    st.info(f"Skipping {int(recent.sum())} contacts already messaged in the last {window_days} days.")
+            except Exception as e:
+                st.warning(f"Could not check the send ledger: {str(e)}")
+        
+        # Progress of each send survives reruns and crashes in the outbox; an
+        # unfinished send to these contacts can be resumed until a new one starts
+        campaign = unfinished_campaign(selected_contacts)
+        resume_button = retry_button = False
+        if campaign is not None:
+            counts = campaign_counts(campaign)
+            st.warning(
+                f"A previous send of these contacts did not finish: {counts[SENT]} sent, "
+                f"{counts[PENDING]} pending, {counts[FAILED]} failed."
+            )
+            resume_cols = st.columns(2)
+            with resume_cols[0]:
+                resume_button = st.button("Resume Sending", disabled=not counts[PENDING])
+            with resume_cols[1]:
+                retry_button = st.button("Retry Failed Only", disabled=not counts[FAILED])
+        
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬅️ Back to Contact Selection"):
@@ -298,64 +455,55 @@ def show():
         with col2:
             send_button = st.button("Send Notifications", type="primary")
             
-            if send_button and not selected_contacts.empty:
-                # Call API to send notifications
-                with st.spinner("Sending notifications..."):
-                    # Prepare for status tracking
-                    status_df = pd.DataFrame(columns=[
-                        "id", "name", "contact", "type", "timestamp", "status", "response"
-                    ])
-                    
-                    # Process each contact one by one (each row is a separate API call)
-                    for idx, contact in selected_contacts.iterrows():
-                        # Create the contact dictionary directly from the row
-                        contact_dict = contact.to_dict()
-                        
-                        # Send notification (one API call per contact)
-                        response, success = send_marketing_notification(contact_dict)
-                        
-                        # Record status
-                        timestamp = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        # Add status entry
-                        status_df = pd.concat([status_df, pd.DataFrame([{
-                            "id": contact["id"],
-                            "name": contact["name"],
-                            "contact": contact["value"],
-                            "type": "Call/SMS" if contact["type"] == "phone_number" else "Email",
-                            "timestamp": timestamp,
-                            "status": "Sent" if success else "Failed",
-                            "response": str(response) if success else "Error"
-                        }])], ignore_index=True)
-                    
-                    st.session_state.status_df = status_df
+        if (send_button or resume_button or retry_button) and not selected_contacts.empty:
+            # Call API to send notifications
+            with st.spinner("Sending notifications..."):
+                # A new send is a campaign of its own; earlier sends are left to the ledger
+                if send_button:
+                    campaign = start_campaign(selected_contacts)
+                    enqueue(to_send, campaign)
                 
-                # Show success and status
+                status_df = send_campaign(
+                    campaign,
+                    retry_failed=retry_button,
+                    coalesce=coalesce,
+                    bulk_size=bulk_size if bulk_mode else 0,
+                    channel_limits={"sms": sms_limit, "email": email_limit},
+                    rate_per_second=rate_limit,
+                    max_retries=max_retries
+                )
+                st.session_state.status_df = status_df
+            
+            # Show success and status
+            sent_count = int((status_df["status"] == "Sent").sum())
+            if sent_count == len(status_df):
                 st.success("Notifications sent successfully!")
-                
-                # Display detailed status
-                st.subheader("Notification Status")
-                st.dataframe(status_df, use_container_width=True)
-                
-                # Option to restart process
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("Start New Process"):
-                        for key in list(st.session_state.keys()):
-                            if key != "step":
-                                del st.session_state[key]
-                        st.session_state.step = 1
-                        st.experimental_rerun()
-                        
-                with col2:
-                    if st.button("Download Notification Report"):
-                        csv = status_df.to_csv(index=False)
-                        st.download_button(
-                            label="Download CSV Report",
-                            data=csv,
-                            file_name="notification_report.csv",
-                            mime="text/csv",
-                        )
+            else:
+                st.warning(f"Sent {sent_count} of {len(status_df)} notifications. Use 'Retry Failed Only' to send the rest.")
+            
+            # Display detailed status
+            st.subheader("Notification Status")
+            st.dataframe(status_df, use_container_width=True)
+            
+            # Option to restart process
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Start New Process"):
+                    for key in list(st.session_state.keys()):
+                        if key != "step":
+                            del st.session_state[key]
+                    st.session_state.step = 1
+                    st.experimental_rerun()
+                    
+            with col2:
+                if st.button("Download Notification Report"):
+                    csv = status_df.to_csv(index=False)
+                    st.download_button(
+                        label="Download CSV Report",
+                        data=csv,
+                        file_name="notification_report.csv",
+                        mime="text/csv",
+                    )
     else:
         st.warning("No recipients selected. Please select at least one recipient to send notifications.")
         
@@ -21,14 +21,16 @@ def initialize_session_state():
         st.session_state.show_sample_data = False
     if "final_data" not in st.session_state:
         st.session_state.final_data = None
-    if "raw_csv" not in st.session_state:
-        st.session_state.raw_csv = None
     if "current_job" not in st.session_state:
         st.session_state.current_job = None
+    if "scrape_jobs" not in st.session_state:
+        st.session_state.scrape_jobs = None
     if "column_order" not in st.session_state:
         st.session_state.column_order = None
     if "custom_column_order" not in st.session_state:
         st.session_state.custom_column_order = None
+    if "column_plan" not in st.session_state:
+        st.session_state.column_plan = []
 
 def show_progress_bar():
     """Display the progress bar and step indicators."""